@@ -0,0 +1 @@
+"""Benchmark scripts (not part of the bot runtime)"""
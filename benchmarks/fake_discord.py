@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import discord
+
+PAGE_SIZE = 100
+
+
+class FakeReaction:
+    def __init__(self, message, emoji: str, user_ids: list[int], latency: float):
+        self.message = message
+        self.emoji = emoji
+        self.count = len(user_ids)
+        self.me = False
+        self.user_ids = user_ids
+        self.latency = latency
+
+    async def users(self, limit=None, after=None):
+        # One simulated request per 100 users, like Discord's pagination
+        for i in range(0, len(self.user_ids), 100):
+            await asyncio.sleep(self.latency)
+            for user_id in self.user_ids[i:i + 100]:
+                yield SimpleNamespace(id=user_id)
+
+
+class FakeHistoryChannel:
+    """Just enough of discord.TextChannel for reconcile_channel, served from memory.
+
+    Every `fetch_ms` of history paging, `reaction_ms` per reaction users page
+    and `fetch_message_ms` per referenced-message lookup is spent sleeping,
+    standing in for Discord's latency.
+    """
+
+    def __init__(self, channel_id: int, pages: int, fetch_ms: float = 150, authors: int = 50,
+                 reactions_every: int = 0, reaction_users: int = 3, reaction_ms: float = 0,
+                 reply_every: int = 0, fetch_message_ms: float = 0, reply_target: int | None = None):
+        self.id = channel_id
+        self.name = f"bench-{channel_id}"
+        self.guild = SimpleNamespace(id=1, get_channel=lambda _id: self)
+        self.fetch_ms = fetch_ms
+        self.reactions_every = reactions_every
+        self.reaction_users = reaction_users
+        self.reaction_ms = reaction_ms
+        self.reply_every = reply_every
+        self.fetch_message_ms = fetch_message_ms
+        # Replies go to the previous message, or all to one popular parent
+        self.reply_target = reply_target
+        # Ids removed on "Discord" (history skips them, fetch_message raises NotFound)
+        self.deleted: set[int] = set()
+        self.first_id = channel_id * 1_000_000 + 1
+        self.last_id = self.first_id + pages * PAGE_SIZE - 1
+        self.created = datetime.now(timezone.utc) - timedelta(days=30)
+        self.authors = [
+            SimpleNamespace(id=9_000_000 + i, name=f"user{i}", discriminator="0", global_name=None, avatar=None, bot=False, system=False)
+            for i in range(authors)
+        ]
+
+    def make_message(self, message_id: int, with_reply: bool = True):
+        offset = message_id - self.first_id
+        message = SimpleNamespace(
+            id=message_id,
+            channel=self,
+            guild=self.guild,
+            author=self.authors[offset % len(self.authors)],
+            content=f"benchmark message {offset}",
+            attachments=[],
+            embeds=[],
+            reactions=[],
+            type=discord.MessageType.default,
+            reference=None,
+            referenced_message=None,
+            created_at=self.created + timedelta(seconds=offset),
+            edited_at=None,
+        )
+        if self.reactions_every and offset % self.reactions_every == 0:
+            user_ids = [author.id for author in self.authors[:self.reaction_users]]
+            message.reactions = [FakeReaction(message, "👍", user_ids, self.reaction_ms / 1000)]
+        if with_reply and self.reply_every and offset % self.reply_every == 0 and message_id > self.first_id:
+            # A reply whose target is not resolved in the payload, so it has to be fetched
+            message.reference = SimpleNamespace(message_id=self.reply_target or message_id - 1, channel_id=self.id, guild_id=1, fail_if_not_exists=False)
+        return message
+
+    async def fetch_message(self, message_id: int):
+        await asyncio.sleep(self.fetch_message_ms / 1000)
+        if message_id in self.deleted:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        return self.make_message(message_id, with_reply=False)
+
+    def page(self, start_id: int) -> list:
+        return [self.make_message(message_id) for message_id in range(start_id, min(self.last_id, start_id + PAGE_SIZE - 1) + 1)]
+
+    async def history(self, limit=100, before=None, after=None, **kwargs):
+        await asyncio.sleep(self.fetch_ms / 1000)
+        if before is not None:
+            ids = range(min(before.id - 1, self.last_id), self.first_id - 1, -1)
+        else:
+            ids = range(self.first_id if after is None else max(self.first_id, after.id + 1), self.last_id + 1)
+        count = 0
+        for message_id in ids:
+            if count == limit:
+                return
+            if message_id in self.deleted:
+                continue
+            count += 1
+            yield self.make_message(message_id)
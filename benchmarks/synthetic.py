@@ -0,0 +1,58 @@
+from sqlalchemy import text
+from db.schema import Base, SEARCH_TS_CONFIG
+
+# Synthetic message text is drawn from these words, so search terms have a known spread of frequencies
+WORDS = (
+    "deploy", "release", "bug", "meeting", "coffee", "review", "database", "search", "cache", "index",
+    "migration", "outage", "roadmap", "lunch", "benchmark", "latency", "refactor", "design", "ticket", "holiday",
+)
+
+
+def seed_messages(engine, rows: int, channels: int, authors: int, reaction_every: int = 10, reset: bool = False):
+    """Fill a scratch database with `rows` synthetic messages.
+
+    Every `reaction_every`-th message gets a 👍 reaction (JSON list and
+    message_reactions row), every 7th of those also a 🔥. Content is a few
+    words from WORDS and content_tsv is filled in directly, since create_all
+    does not install the trigger that maintains it.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM messages")).scalar()
+        if existing >= rows and not reset:
+            print(f"Using existing {existing} rows")
+            return
+
+        print(f"Seeding {rows} messages...")
+        conn.execute(text("TRUNCATE messages, users CASCADE"))
+        conn.execute(text(
+            "INSERT INTO users (id, username, bot, system) "
+            "SELECT g, 'user' || g, false, false FROM generate_series(1, :authors) g"
+        ), {"authors": authors})
+        conn.execute(text(
+            "INSERT INTO messages (id, channel_id, author_id, content, content_tsv, timestamp, type, attachments, embeds, reactions, mentions) "
+            "SELECT g, 1000 + g % :channels, 1 + g % :authors, c.content, to_tsvector(CAST(:ts_config AS regconfig), c.content), "
+            "now() - make_interval(secs => g), 'DEFAULT', '[]', '[]', "
+            "CASE WHEN g % :every = 0 THEN jsonb_build_array(jsonb_build_object("
+            "  'count', 1, 'emoji', jsonb_build_object('id', NULL, 'name', CASE WHEN g % (:every * 7) = 0 THEN '🔥' ELSE '👍' END),"
+            "  'users', jsonb_build_array(1 + g % :authors))) ELSE '[]'::jsonb END, "
+            "'[]' "
+            "FROM generate_series(1, :rows) g "
+            "CROSS JOIN LATERAL (SELECT (:words)[1 + g % 20] || ' ' || (:words)[1 + (g / 20) % 20] || ' ' "
+            "  || (:words)[1 + (g / 400) % 20] || ' message ' || g AS content) c"
+        ), {
+            "rows": rows, "channels": channels, "authors": authors, "every": reaction_every,
+            "words": list(WORDS), "ts_config": SEARCH_TS_CONFIG,
+        })
+        conn.execute(text(
+            "INSERT INTO message_reactions (message_id, emoji_id, emoji_name, user_id) "
+            "SELECT m.id, NULL, r.value -> 'emoji' ->> 'name', (r.value -> 'users' ->> 0)::bigint "
+            "FROM messages m CROSS JOIN LATERAL jsonb_array_elements(m.reactions) AS r(value)"
+        ))
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE messages"))
+        conn.execute(text("ANALYZE message_reactions"))
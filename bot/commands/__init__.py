@@ -3,6 +3,9 @@ from .askfile import askfile
 from .list import list
 from .reconcile import reconcile
 from .backfill import backfill
+from .search import search
+from .reconcile_guild import reconcile_guild
+from .reconcile_deletions import reconcile_deletions
 
 def setup_commands(bot):
     bot.tree.add_command(ask)
@@ -10,3 +13,6 @@ def setup_commands(bot):
     bot.tree.add_command(list)
     bot.tree.add_command(reconcile)
     bot.tree.add_command(backfill)
+    bot.tree.add_command(search)
+    bot.tree.add_command(reconcile_guild)
+    bot.tree.add_command(reconcile_deletions)
@@ -1,13 +1,16 @@
 import discord
+from typing import Literal
 from discord import app_commands
 from bot.utils.db_handler import reconcile_channel
+from bot.config.settings import RECONCILE_REACTION_MODE
 
 @app_commands.command(name="backfill", description="Backfill the current channel with older Discord messages")
-async def backfill(interaction: discord.Interaction):
+@app_commands.describe(reactions="immediate: fetch reaction users now; counts: emoji counts only; full: counts now, users in the background")
+async def backfill(interaction: discord.Interaction, reactions: Literal["immediate", "counts", "full"] = RECONCILE_REACTION_MODE):
     try:
         await interaction.response.defer(ephemeral=True)
         await interaction.followup.send("Bot is working on this...", ephemeral=True)
-        await reconcile_channel(interaction.channel, backfill=True)
+        await reconcile_channel(interaction.channel, backfill=True, reaction_mode=reactions)
         await interaction.followup.send("Channel backfilled completely.", ephemeral=True)
     except Exception as e:
         print(f"Error backfilling channel {interaction.channel.id}: {e}")
@@ -2,8 +2,10 @@ import discord
 from discord import app_commands
 from discord.ui import View, Button, Modal, TextInput, Select
 from datetime import datetime
-from bot.utils.db_handler import filter_command
-import io
+from bot.utils.export_writer import export_filter_results, DEFAULT_UPLOAD_LIMIT, EXPORT_WRITERS
+from bot.utils.db_handler import fetch_filter_page, browse_cursor
+from bot.utils.message_embeds import add_message_field
+from bot.utils.filter_cache import filter_cache
 
 class InputModal(Modal):
     def __init__(self, title: str, label: str, callback):
@@ -41,6 +43,73 @@ class SelectDropdownView(View):
         self.add_item(select_menu)
 
 
+class BrowseView(View):
+    """Pages through /list results with keyset cursors.
+
+    Only the filters and the cursors of the page on screen are kept; each
+    click runs one indexed range query for the next or previous page.
+    """
+
+    def __init__(self, guild: discord.Guild, filters: dict):
+        super().__init__(timeout=300)
+        self.guild = guild
+        self.filters = dict(filters)
+        self.first_cursor = None
+        self.last_cursor = None
+        self.page = 1
+
+        self.prev_button = Button(label="Prev", style=discord.ButtonStyle.secondary)
+        self.prev_button.callback = self.prev_callback
+        self.add_item(self.prev_button)
+
+        self.next_button = Button(label="Next", style=discord.ButtonStyle.primary)
+        self.next_button.callback = self.next_callback
+        self.add_item(self.next_button)
+
+    async def load_page(self, after: tuple | None = None, before: tuple | None = None) -> discord.Embed:
+        messages, has_more = await fetch_filter_page(self.filters, after=after, before=before)
+
+        if before is not None:
+            self.prev_button.disabled = not has_more
+            self.next_button.disabled = False
+        else:
+            self.prev_button.disabled = after is None
+            self.next_button.disabled = not has_more
+
+        sort_by = self.filters.get("sort_by", "desc")
+        if messages:
+            self.first_cursor = browse_cursor(messages[0], sort_by)
+            self.last_cursor = browse_cursor(messages[-1], sort_by)
+        else:
+            self.next_button.disabled = True
+
+        embed = discord.Embed(
+            title="Messages",
+            description=None if messages else "No messages found matching the selected filters.",
+            color=discord.Color.blue()
+        )
+        for message in messages:
+            add_message_field(embed, self.guild, message)
+        embed.set_footer(text=f"Page {self.page} · Sort: {sort_by}")
+        return embed
+
+    async def prev_callback(self, interaction: discord.Interaction):
+        self.page = max(1, self.page - 1)
+        await self.show(interaction, before=self.first_cursor)
+
+    async def next_callback(self, interaction: discord.Interaction):
+        self.page += 1
+        await self.show(interaction, after=self.last_cursor)
+
+    async def show(self, interaction: discord.Interaction, after: tuple | None = None, before: tuple | None = None):
+        try:
+            embed = await self.load_page(after=after, before=before)
+            await interaction.response.edit_message(embed=embed, view=self)
+        except Exception as e:
+            print(f"Error browsing messages: {e}")
+            await interaction.response.send_message(f"Error: {str(e)}", ephemeral=True)
+
+
 class FiltersView(View):
     def __init__(self, guild: discord.Guild):
         super().__init__(timeout=300)
@@ -55,7 +124,8 @@ class FiltersView(View):
             "has_attachments": False,
             "attachment_name_contains": "",
             "sort_by": "desc",
-            "limit":20
+            "limit":20,
+            "format": "txt"
         }
 
         # Build channel options
@@ -91,6 +161,7 @@ class FiltersView(View):
             ("Attachment Name Contains","Enter attachment name contains", "attachment_name_contains"),
             ("Sort By","Sort by [asc/desc/reactions_desc]", "sort_by"),
             ("Limit","Enter limit [number]", "limit"),
+            ("Export Format","Export format [txt/csv/jsonl/parquet]", "format"),
         ]
 
         for label, input_label, key in button_configs:
@@ -100,6 +171,10 @@ class FiltersView(View):
         submit_button.callback = self.submit_callback
         self.add_item(submit_button)
 
+        browse_button = Button(label="Browse", style=discord.ButtonStyle.secondary, custom_id="browse")
+        browse_button.callback = self.browse_callback
+        self.add_item(browse_button)
+
     async def handle_channel_select(self, interaction: discord.Interaction, values: list):
         self.filters["channels"] = values
         await interaction.response.defer(ephemeral=True)
@@ -143,100 +218,79 @@ class FiltersView(View):
                 self.filters[key] = int(value)
             except ValueError:
                 self.filters[key] = 20
+        elif key == "format":
+            export_format = value.strip().lower()
+            if export_format in EXPORT_WRITERS:
+                self.filters[key] = export_format
+            else:
+                await interaction.response.send_message(
+                    f"Unknown export format. Use one of: {', '.join(EXPORT_WRITERS)}",
+                    ephemeral=True
+                )
         else:
             self.filters[key] = value
 
     async def submit_callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         
+        export = None
         try:
-            messages = await filter_command(self.filters)            
-            if messages:
-                print(f"Messages count: {len(messages)}")
+            upload_limit = interaction.guild.filesize_limit if interaction.guild else DEFAULT_UPLOAD_LIMIT
+            export = await export_filter_results(self.filters, upload_limit=upload_limit)
+            print(f"Messages count: {export.count}; filter cache: {filter_cache.stats()}")
             
-            if not messages:
+            if export.count == 0:
                 await interaction.followup.send(
                     "No messages found matching the selected filters.",
                     ephemeral=True
                 )
                 return
             
-            output_text = "FILTERS APPLIED:\n\n"
-            output_text += f"Channels: {', '.join(self.filters['channels']) if self.filters['channels'] else 'All channels'}\n"
-            output_text += f"Members: {', '.join(self.filters['members']) if self.filters['members'] else 'All members'}\n"
-            output_text += f"Reactions: {', '.join(self.filters['reactions']) if self.filters['reactions'] else 'All reactions'}\n"
-            output_text += f"From Date: {self.filters['from_date'].strftime('%Y-%m-%d %H:%M:%S') if self.filters['from_date'] else 'Not set'}\n"
-            output_text += f"To Date: {self.filters['to_date'].strftime('%Y-%m-%d %H:%M:%S') if self.filters['to_date'] else 'Not set'}\n"
-            output_text += f"Has Attachments: {self.filters['has_attachments']}\n"
-            output_text += f"Sort By: {self.filters['sort_by']}\n"
-            output_text += f"Total Results: {len(messages)} messages\n"
-            output_text += "\n" + "=" * 80 + "\n\n"
-            
-            for i, msg in enumerate(messages, 1):
-                try:
-                    output_text += f"MESSAGE {i}\n"
-                    output_text += "-" * 80 + "\n"
-                    output_text += f"Message ID: {msg.id}\n"
-                    output_text += f"Channel ID: {msg.channel_id}\n"
-                    output_text += f"Author ID: {msg.author_id}\n"
-                    output_text += f"Timestamp: {msg.timestamp}\n"
-                    
-                    if msg.edited_timestamp:
-                        output_text += f"Edited Timestamp: {msg.edited_timestamp}\n"
-                    
-                    output_text += f"\nContent:\n"
-                    output_text += f"{msg.content if msg.content else '(No content)'}\n"
-                    
-                    if msg.attachments and len(msg.attachments) > 0:
-                        output_text += f"\nAttachments ({len(msg.attachments)}):\n"
-                        for att in msg.attachments:
-                            output_text += f"  - {att.get('filename', 'Unknown')} ({att.get('size', '?')} bytes)\n"
-                            output_text += f"    URL: {att.get('url', 'N/A')}\n"
-                            output_text += f"    Local Path: {att.get('local_path', 'Not downloaded')}\n"
-                    
-                    if msg.reactions and len(msg.reactions) > 0:
-                        output_text += f"\nReactions ({len(msg.reactions)}):\n"
-                        for reaction in msg.reactions:
-                            emoji_name = reaction.get('emoji', {}).get('name', 'Unknown')
-                            count = reaction.get('count', 0)
-                            output_text += f"  - {emoji_name} x{count}\n"
-                    
-                    if msg.embeds and len(msg.embeds) > 0:
-                        output_text += f"\nEmbeds ({len(msg.embeds)}):\n"
-                        for embed in msg.embeds:
-                            output_text += f"  - Title: {embed.get('title', 'No title')}\n"
-                            output_text += f"    Description: {embed.get('description', 'No description')}\n"
-                    
-                    output_text += "\n\n"
-                    
-                except Exception as msg_err:
-                    print(f"Error processing message ID {msg.id}: {msg_err}")
-                    continue
+            if export.size > upload_limit:
+                await interaction.followup.send(
+                    f"Found {export.count} messages, but the export is too large to upload even compressed. "
+                    "Narrow the filters or lower the limit.",
+                    ephemeral=True
+                )
+                return
             
             embed = discord.Embed(
                 title="Messages Found",
-                description=f"Successfully found {len(messages)} messages matching your filters.",
+                description=f"Successfully found {export.count} messages matching your filters.",
                 color=discord.Color.green()
             )
-            embed.add_field(name="Total Results", value=str(len(messages)), inline=True)
+            embed.add_field(name="Total Results", value=str(export.count), inline=True)
             embed.add_field(name="Sort Order", value=self.filters['sort_by'], inline=True)
+            embed.add_field(name="Format", value=self.filters['format'], inline=True)
+            if export.compressed:
+                embed.add_field(name="Compressed", value="gzip (over upload limit)", inline=True)
             
-            file = discord.File(
-                io.BytesIO(output_text.encode('utf-8')),
-                filename=f"messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            )
+            file = discord.File(export.file, filename=export.filename)
             await interaction.followup.send(embed=embed, file=file, ephemeral=True)
                 
         except Exception as e:
             print(f"Error in submit_callback: {e}")
             await interaction.followup.send(f"Error processing filters: {str(e)}", ephemeral=True)
+        finally:
+            if export:
+                export.close()
+
+    async def browse_callback(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            view = BrowseView(interaction.guild, self.filters)
+            embed = await view.load_page()
+            await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+        except Exception as e:
+            print(f"Error in browse_callback: {e}")
+            await interaction.followup.send(f"Error browsing messages: {str(e)}", ephemeral=True)
 
 @app_commands.command(name="list", description="List and filter messages with advanced filters")
 async def list(interaction: discord.Interaction):
     view = FiltersView(interaction.guild)
     embed = discord.Embed(
         title="Select Filters",
-        description="Use the buttons below to set filters, then click Submit to see the selected filters.",
+        description="Use the buttons below to set filters, then click Submit to export the results or Browse to page through them.",
         color=discord.Color.blue()
     )
     await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
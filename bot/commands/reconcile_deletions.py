@@ -0,0 +1,29 @@
+import discord
+from discord import app_commands
+from bot.utils.deletion_scan import scan_channel_deletions
+from bot.config.settings import DELETION_SCAN_DAYS
+
+@app_commands.command(name="reconcile-deletions", description="Remove archived messages of this channel that were deleted while the bot was offline")
+@app_commands.describe(
+    days="How many days back to check (0 = the whole channel)",
+    dry_run="Only report the messages that would be removed"
+)
+@app_commands.default_permissions(manage_messages=True)
+@app_commands.guild_only()
+async def reconcile_deletions(
+    interaction: discord.Interaction,
+    days: app_commands.Range[int, 0, 3650] = DELETION_SCAN_DAYS,
+    dry_run: bool = False
+):
+    try:
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        result = await scan_channel_deletions(interaction.channel, days=days, dry_run=dry_run)
+        outcome = f"{result['missing']} would be removed" if dry_run else f"{result['deleted']} removed"
+        await interaction.followup.send(
+            f"Checked {result['buckets']} buckets with {result['pages']} history requests; "
+            f"{result['differing']} differed. Deleted messages: {outcome}.",
+            ephemeral=True
+        )
+    except Exception as e:
+        print(f"Error scanning channel {interaction.channel.id} for deletions: {e}")
+        await interaction.followup.send(f"Error: {str(e)}", ephemeral=True)
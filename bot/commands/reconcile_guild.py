@@ -0,0 +1,41 @@
+import discord
+from typing import Literal
+from discord import app_commands
+from bot.utils.guild_reconcile import reconcile_guild as run_guild_reconcile
+from bot.config.settings import RECONCILE_GUILD_CONCURRENCY, RECONCILE_REACTION_MODE
+
+@app_commands.command(name="reconcile-guild", description="Reconcile every text channel of this server with Discord history")
+@app_commands.describe(
+    backfill="Fetch older messages before the oldest archived one instead of newer ones",
+    concurrency="Channels processed at the same time",
+    reactions="immediate: fetch reaction users now; counts: emoji counts only; full: counts now, users in the background"
+)
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.guild_only()
+async def reconcile_guild(
+    interaction: discord.Interaction,
+    backfill: bool = False,
+    concurrency: app_commands.Range[int, 1, 16] = RECONCILE_GUILD_CONCURRENCY,
+    reactions: Literal["immediate", "counts", "full"] = RECONCILE_REACTION_MODE
+):
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    status = {"editable": True}
+
+    async def update_status(progress):
+        # Interaction tokens expire after 15 minutes; after that the run continues without updates
+        if not status["editable"]:
+            return
+        try:
+            await interaction.edit_original_response(content=progress.render())
+        except discord.HTTPException as e:
+            status["editable"] = False
+            print(f"Stopped updating /reconcile-guild status: {e}")
+
+    try:
+        await run_guild_reconcile(interaction.guild, backfill=backfill, concurrency=concurrency,
+                                  reaction_mode=reactions, on_status=update_status)
+    except Exception as e:
+        print(f"Error reconciling guild {interaction.guild.id}: {e}")
+        if status["editable"]:
+            await interaction.followup.send(f"Error: {str(e)}", ephemeral=True)
@@ -0,0 +1,100 @@
+import discord
+from discord import app_commands
+from discord.ui import View, Button
+from datetime import datetime
+from bot.utils.db_handler import search_messages
+from bot.utils.message_embeds import add_message_field
+
+
+def build_results_embed(guild: discord.Guild, search_text: str, rows, page: int) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"Search: {search_text}"[:256],
+        description=None if rows else "No messages found.",
+        color=discord.Color.blue()
+    )
+    for row in rows:
+        add_message_field(embed, guild, row)
+    embed.set_footer(text=f"Page {page}")
+    return embed
+
+
+class SearchResultsView(View):
+    """Pages through ranked results; only the filters and page cursors are kept."""
+
+    def __init__(self, guild: discord.Guild, search_text: str, filters: dict):
+        super().__init__(timeout=300)
+        self.guild = guild
+        self.search_text = search_text
+        self.filters = filters
+        # Cursor that starts each visited page; the first page has none
+        self.cursors = [None]
+        self.next_cursor = None
+
+        self.prev_button = Button(label="Prev", style=discord.ButtonStyle.secondary)
+        self.prev_button.callback = self.prev_callback
+        self.add_item(self.prev_button)
+
+        self.next_button = Button(label="Next", style=discord.ButtonStyle.primary)
+        self.next_button.callback = self.next_callback
+        self.add_item(self.next_button)
+
+    async def load_page(self) -> discord.Embed:
+        rows, self.next_cursor = await search_messages(self.search_text, self.filters, self.cursors[-1])
+        self.prev_button.disabled = len(self.cursors) == 1
+        self.next_button.disabled = self.next_cursor is None
+        return build_results_embed(self.guild, self.search_text, rows, len(self.cursors))
+
+    async def prev_callback(self, interaction: discord.Interaction):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await self.show(interaction)
+
+    async def next_callback(self, interaction: discord.Interaction):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await self.show(interaction)
+
+    async def show(self, interaction: discord.Interaction):
+        try:
+            embed = await self.load_page()
+            await interaction.response.edit_message(embed=embed, view=self)
+        except Exception as e:
+            print(f"Error paging search results: {e}")
+            await interaction.response.send_message(f"Error: {str(e)}", ephemeral=True)
+
+
+@app_commands.command(name="search", description="Full-text search of archived messages")
+@app_commands.describe(
+    query="Words to find; supports \"quoted phrases\", OR and -exclusions",
+    channel="Only search this channel",
+    member="Only messages from this member",
+    from_date="From date [YYYY-MM-DD HH:MM:SS]",
+    to_date="To date [YYYY-MM-DD HH:MM:SS]",
+)
+async def search(
+    interaction: discord.Interaction,
+    query: str,
+    channel: discord.TextChannel | None = None,
+    member: discord.Member | None = None,
+    from_date: str | None = None,
+    to_date: str | None = None,
+):
+    try:
+        filters = {
+            "channels": [str(channel.id)] if channel else [],
+            "members": [str(member.id)] if member else [],
+            "from_date": datetime.fromisoformat(from_date) if from_date else None,
+            "to_date": datetime.fromisoformat(to_date) if to_date else None,
+        }
+    except ValueError:
+        await interaction.response.send_message("Invalid date format. Use YYYY-MM-DD HH:MM:SS", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    try:
+        view = SearchResultsView(interaction.guild, query, filters)
+        embed = await view.load_page()
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+    except Exception as e:
+        print(f"Error searching messages: {e}")
+        await interaction.followup.send(f"Error: {str(e)}", ephemeral=True)
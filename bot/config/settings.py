@@ -6,3 +6,78 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 DATABASE_URL = os.getenv("DATABASE_URL")
 OPENAI_KEY = os.getenv("OPENAI_KEY")
+
+# Database connection pool (reconcile workers, page preparation and background writers share it)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+# Live message ingest (write-behind batching)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "0.25"))
+INGEST_QUEUE_MAXSIZE = int(os.getenv("INGEST_QUEUE_MAXSIZE", "10000"))
+# Seconds between ingest queue stats lines while the bot runs (0 disables)
+INGEST_STATS_INTERVAL = float(os.getenv("INGEST_STATS_INTERVAL", "300"))
+
+# Author cache (skips user upserts when the profile is unchanged)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "50000"))
+
+# Attachment downloads
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "16"))
+DOWNLOAD_PER_HOST_CONCURRENCY = int(os.getenv("DOWNLOAD_PER_HOST_CONCURRENCY", "8"))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "120"))
+
+# Reaction events on the same message within this window are written together
+REACTION_COALESCE_WINDOW = float(os.getenv("REACTION_COALESCE_WINDOW", "0.5"))
+
+# Upper bound on rows a single /list query may load
+LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+
+# /list result cache: entries, seconds to live, and the largest rendered export kept in memory
+FILTER_CACHE_SIZE = int(os.getenv("FILTER_CACHE_SIZE", "256"))
+FILTER_CACHE_TTL = float(os.getenv("FILTER_CACHE_TTL", "300"))
+FILTER_CACHE_MAX_EXPORT_BYTES = int(os.getenv("FILTER_CACHE_MAX_EXPORT_BYTES", str(1024 * 1024)))
+# Approximate memory budget of all cached entries; a result larger than an eighth of it is not cached
+FILTER_CACHE_MAX_BYTES = int(os.getenv("FILTER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Discord history pages fetched ahead while earlier pages are being written (0 = no overlap)
+RECONCILE_QUEUE_DEPTH = int(os.getenv("RECONCILE_QUEUE_DEPTH", "2"))
+
+# Messages of one history page prepared at the same time
+RECONCILE_PREPARE_CONCURRENCY = int(os.getenv("RECONCILE_PREPARE_CONCURRENCY", "8"))
+
+# How reconcile stores reactions: "immediate" (user lists fetched with the page), "counts" (emoji and
+# count only, no extra requests) or "full" (counts now, user lists later from a background queue)
+RECONCILE_REACTION_MODE = os.getenv("RECONCILE_REACTION_MODE", "immediate")
+
+# Background reaction hydration ("full" mode): requests per second and messages waiting at most
+REACTION_HYDRATE_RATE = float(os.getenv("REACTION_HYDRATE_RATE", "1"))
+REACTION_HYDRATE_QUEUE_MAXSIZE = int(os.getenv("REACTION_HYDRATE_QUEUE_MAXSIZE", "100000"))
+
+# Reply targets remembered between lookups
+REFERENCE_CACHE_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", "10000"))
+
+# Offline-deletion scan: how far back to look (0 = whole channel) and hours of history per bucket
+DELETION_SCAN_DAYS = int(os.getenv("DELETION_SCAN_DAYS", "30"))
+DELETION_SCAN_BUCKET_HOURS = float(os.getenv("DELETION_SCAN_BUCKET_HOURS", "24"))
+
+# /reconcile-guild: channels reconciled at once and seconds between status message updates
+RECONCILE_GUILD_CONCURRENCY = int(os.getenv("RECONCILE_GUILD_CONCURRENCY", "4"))
+RECONCILE_STATUS_INTERVAL = float(os.getenv("RECONCILE_STATUS_INTERVAL", "5"))
+
+# Client-side pacing of Discord REST calls (requests per second, globally and per route)
+DISCORD_GLOBAL_RATE = float(os.getenv("DISCORD_GLOBAL_RATE", "40"))
+DISCORD_ROUTE_RATE = float(os.getenv("DISCORD_ROUTE_RATE", "4"))
+DISCORD_ROUTE_BURST = float(os.getenv("DISCORD_ROUTE_BURST", "5"))
+
+# Messages per page when browsing /list results
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "10"))
+
+# /list exports (streamed from a server-side cursor)
+EXPORT_MAX_LIMIT = int(os.getenv("EXPORT_MAX_LIMIT", "100000"))
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "500"))
+EXPORT_SPOOL_SIZE = int(os.getenv("EXPORT_SPOOL_SIZE", str(8 * 1024 * 1024)))
+
+# /search results per page, and how many of the newest matches get ranked
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "10000"))
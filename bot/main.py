@@ -8,7 +8,13 @@ from bot.utils.db_handler import (
     handle_message_update,
     handle_reaction_add,
     handle_reaction_remove,
+    hydrate_message_reactions,
 )
+from bot.utils.ingest_queue import ingest_queue
+from bot.utils.file_manager import attachment_downloader
+from bot.utils.reaction_buffer import reaction_buffer
+from bot.utils.reaction_hydrator import reaction_hydrator
+from bot.utils.filter_cache import filter_cache
 
 
 
@@ -24,8 +30,24 @@ intents.guilds = True
 intents.members = True      
 intents.guild_reactions = True   
 
+class ArchiveBot(commands.Bot):
+    async def setup_hook(self):
+        # Background writers live for the whole bot session
+        ingest_queue.start()
+        reaction_hydrator.start(hydrate_message_reactions)
+
+    async def close(self):
+        # Persist anything still buffered before the connection goes away
+        await reaction_hydrator.stop()
+        await ingest_queue.stop()
+        await reaction_buffer.stop()
+        await attachment_downloader.close()
+        print(f"Filter cache: {filter_cache.stats()}")
+        await super().close()
+
+
 # Bot instance (slash commands don't use command_prefix)
-bot = commands.Bot(command_prefix=None, intents=intents)
+bot = ArchiveBot(command_prefix=None, intents=intents)
 
 
 # ==================== LOAD COMMANDS ====================
@@ -1,15 +1,28 @@
 import asyncio
 import discord
+import os
 import time
-from sqlalchemy import func, String
+from sqlalchemy import func, String, REAL, cast, literal_column, tuple_
 from sqlalchemy.future import select
 from db.connection import AsyncSessionLocal
-from db.queries.user import upsert_user
-from db.queries.messages import create_message, update_message, delete_message, get_message, batch_create_messages, batch_update_messages, get_messages_batch
-from db.schema import User, Message, MessageType
-from bot.utils.file_manager import download_attachment
+from db.queries.user import upsert_user, bulk_upsert_users
+from db.queries.messages import create_message, update_message, delete_message, get_message, batch_create_messages, batch_update_message_columns, get_message_fingerprints, get_message_attachments
+from db.schema import User, Message, MessageType, reaction_count, SEARCH_TS_CONFIG
+from db.queries.reactions import reaction_entry, reaction_count_entry, has_any_reaction, set_message_reactions
+from db.queries.sync_state import get_sync_state, advance_sync_state, mark_sync_run
+from db.queries.attachments import mark_attachment_downloaded, get_attachment_blob, record_attachment_blob, has_attachment, attachment_name_contains
+from bot.utils.file_manager import attachment_downloader, blob_path
+from bot.utils.ingest_queue import ingest_queue
+from bot.utils.user_cache import user_cache
+from bot.utils.reaction_buffer import reaction_buffer
+from bot.utils.reaction_hydrator import reaction_hydrator
+from bot.utils.reference_resolver import reference_resolver, reference_payload
+from bot.utils.filter_cache import filter_cache
+from bot.utils.rate_limiter import route_limiter
+from bot.utils.prefetch import prefetch
+from bot.utils.message_fingerprint import message_fingerprint, message_flags, changed_parts
+from bot.config.settings import LIST_MAX_LIMIT, EXPORT_MAX_LIMIT, EXPORT_FETCH_SIZE, LIST_PAGE_SIZE, RECONCILE_QUEUE_DEPTH, RECONCILE_PREPARE_CONCURRENCY, RECONCILE_REACTION_MODE, SEARCH_PAGE_SIZE, SEARCH_MAX_CANDIDATES
 from datetime import datetime
-from .serialize_datetime import serialize_datetime
 from .response_time import format_elapsed_time
 
 
@@ -24,13 +37,17 @@ def build_message_model(msg: discord.Message, msg_data: dict) -> Message:
         reactions=msg_data["emojis_list"],
         type=msg_data["message_type"],
         timestamp=getattr(msg, "created_at", datetime.utcnow()),
+        edited_timestamp=getattr(msg, "edited_at", None),
+        pinned=bool(getattr(msg, "pinned", False)),
+        flags=message_flags(msg),
         message_reference=msg_data["message_reference"],
-        referenced_message=msg_data["referenced_message"]
+        referenced_message=msg_data["referenced_message"],
+        fingerprint=message_fingerprint(msg)
     )
 
 
-async def user_helper_function(db, discord_user: discord.User) -> User:
-    user_model = User(
+def build_user_model(discord_user: discord.User) -> User:
+    return User(
         id=int(discord_user.id),
         username=getattr(discord_user, "name", None),
         discriminator=getattr(discord_user, "discriminator", None),
@@ -39,23 +56,47 @@ async def user_helper_function(db, discord_user: discord.User) -> User:
         bot=bool(getattr(discord_user, "bot", False)),
         system=bool(getattr(discord_user, "system", False)),
     )
+
+
+async def user_helper_function(db, discord_user: discord.User) -> User:
+    user_model = build_user_model(discord_user)
+
+    # Only touch the DB when the profile changed since we last saved it
+    cached_user = user_cache.get(user_model)
+    if cached_user:
+        return cached_user
+
     saved_user = await upsert_user(db, user_model)
+    user_cache.put(saved_user)
     return saved_user
-    
 
-def reaction_dict(emoji, users_list):
+
+async def upsert_authors(db, discord_users: list[discord.User]) -> int:
+    # Upsert every new or changed author of a page in a single statement
+    changed_users = {}
+    for discord_user in discord_users:
+        user_model = build_user_model(discord_user)
+        if user_model.id not in changed_users and not user_cache.get(user_model):
+            changed_users[user_model.id] = user_model
+
+    if not changed_users:
+        return 0
+
+    saved_users = await bulk_upsert_users(db, list(changed_users.values()))
+    for saved_user in saved_users:
+        user_cache.put(saved_user)
+    return len(saved_users)
+
+
+def emoji_identity(emoji) -> tuple[str | None, str]:
     emoji_id = str(emoji.id) if hasattr(emoji, 'id') and emoji.id else None
     emoji_name = str(emoji.name) if hasattr(emoji, 'name') else str(emoji)
-    
-    return {
-        'count': len(users_list),
-        'count_details': {'burst': 0, 'normal': len(users_list)},
-        'me': False,
-        'me_burst': False,
-        'emoji': {'id': emoji_id, 'name': emoji_name},
-        'burst_colors': [],
-        'users': users_list
-    }
+    return emoji_id, emoji_name
+
+
+def reaction_dict(emoji, users_list):
+    emoji_id, emoji_name = emoji_identity(emoji)
+    return reaction_entry(emoji_id, emoji_name, users_list)
 
 
 # async def extract_attachments(message: discord.Message):
@@ -79,25 +120,69 @@ def reaction_dict(emoji, users_list):
 
 
 async def extract_attachments(message: discord.Message):
-    async def download_attachments(attachment):
-        local_path, success = await download_attachment(
-            attachment.url,
-            attachment.filename,
-            message.id
-        )
-        return {
+    # Metadata only; files are fetched in the background once the row is stored
+    return [
+        {
             "id": attachment.id,
             "filename": attachment.filename,
             "url": attachment.url,
             "content_type": getattr(attachment, "content_type", None),
             "size": getattr(attachment, "size", None),
-            "local_path": local_path if success else None,
-            "is_downloaded": success,
+            "local_path": None,
+            "is_downloaded": False,
         }
-    
-    attachments_list = await asyncio.gather(*[download_attachments(att) for att in message.attachments])
+        for attachment in message.attachments
+    ]
+
+
+def carry_over_downloads(attachments_list: list[dict], existing_attachments: list[dict] | None) -> list[dict]:
+    # Keep files we already have for an edited message instead of downloading them again
+    downloaded = {
+        str(att.get("id")): att for att in (existing_attachments or []) if att.get("is_downloaded")
+    }
+    for att in attachments_list:
+        previous = downloaded.get(str(att["id"]))
+        if previous:
+            att["local_path"] = previous.get("local_path")
+            att["is_downloaded"] = True
     return attachments_list
 
+
+async def download_and_record_attachment(message_id: int, channel_id: int, attachment: dict):
+    try:
+        # Skip the download when this attachment is already in the store
+        async with AsyncSessionLocal() as db:
+            blob = await get_attachment_blob(db, int(attachment["id"]), attachment["url"])
+        sha256 = blob.sha256 if blob else None
+        local_path = str(blob_path(sha256)) if sha256 else None
+
+        if not local_path or not await asyncio.to_thread(os.path.exists, local_path):
+            local_path, sha256, size = await attachment_downloader.download(
+                attachment["url"],
+                attachment["filename"]
+            )
+            if not sha256:
+                return
+            async with AsyncSessionLocal() as db:
+                await record_attachment_blob(db, int(attachment["id"]), attachment["url"], sha256, size)
+
+        # The message row may still be sitting in the ingest queue
+        await ingest_queue.ensure_flushed(message_id)
+
+        async with AsyncSessionLocal() as db:
+            if await mark_attachment_downloaded(db, message_id, attachment["id"], local_path, sha256):
+                filter_cache.bump_channel(channel_id)
+            else:
+                print(f"Attachment {attachment['id']} of message {message_id} not found in DB")
+    except Exception as e:
+        print(f"Error recording attachment {attachment['id']} for message {message_id}: {e}")
+
+
+def schedule_attachment_downloads(message_id: int, channel_id: int, attachments_list: list[dict]):
+    for attachment in attachments_list:
+        if not attachment.get("is_downloaded"):
+            attachment_downloader.schedule(download_and_record_attachment(message_id, channel_id, attachment))
+
 async def build_referenced_message(message_reference_data, message: discord.Message):
     if not message_reference_data:
         return None, None
@@ -109,45 +194,67 @@ async def build_referenced_message(message_reference_data, message: discord.Mess
         "fail_if_not_exists": getattr(message_reference_data, "fail_if_not_exists", True)
     }
 
-    # Try getting full referenced message
+    # The gateway often includes the target; otherwise resolve it locally first, then from Discord
     ref_msg = getattr(message, "referenced_message", None)
-    if not ref_msg and message_reference.get("channel_id") and message_reference.get("message_id"):
+    referenced_message = None
+    if isinstance(ref_msg, discord.Message):
+        referenced_message = reference_payload(ref_msg)
+        reference_resolver.remember(int(ref_msg.id), referenced_message)
+    elif message_reference.get("channel_id") and message_reference.get("message_id"):
         try:
-            ref_channel = message.guild.get_channel(message_reference["channel_id"]) \
-                or await message.guild.fetch_channel(message_reference["channel_id"])
-            ref_msg = await ref_channel.fetch_message(message_reference["message_id"])
+            referenced_message = await reference_resolver.resolve(
+                message.guild, int(message_reference["channel_id"]), int(message_reference["message_id"])
+            )
         except:
-            ref_msg = None
-
-    referenced_message = None
-    if ref_msg:
-        referenced_message = {
-            "id": int(ref_msg.id),
-            "channel_id": int(ref_msg.channel.id) if getattr(ref_msg, "channel", None) else None,
-            "author": {
-                "id": int(ref_msg.author.id),
-                "username": getattr(ref_msg.author, "name", None),
-                "discriminator": getattr(ref_msg.author, "discriminator", None),
-                "global_name": getattr(ref_msg.author, "global_name", None),
-                "avatar": str(ref_msg.author.avatar.url) if getattr(ref_msg.author, "avatar", None) else None,
-                "bot": bool(getattr(ref_msg.author, "bot", False)),
-                "system": bool(getattr(ref_msg.author, "system", False)),
-            },
-            "content": ref_msg.content,
-            "attachments": [att.to_dict() for att in getattr(ref_msg, "attachments", [])],
-            "embeds": [emb.to_dict() for emb in getattr(ref_msg, "embeds", [])],
-            "timestamp": serialize_datetime(getattr(ref_msg, "created_at", None)),
-            "edited_timestamp": serialize_datetime(getattr(ref_msg, "edited_at", None)),
-            "type": getattr(ref_msg, "type", None).name if getattr(ref_msg, "type", None) else None
-        }
+            referenced_message = None
     
     return message_reference, referenced_message
 
-async def fetch_reaction_data(reaction):
-        users = [u.id async for u in reaction.users()]
-        return reaction_dict(reaction.emoji, users)
+async def fetch_reaction_data(reaction, pace=None):
+    # Discord returns at most 100 users per request, so each page takes its own token
+    # (and, when a caller paces its requests, its own `pace()`)
+    users = []
+    after = None
+    while True:
+        if pace:
+            await pace()
+        await route_limiter.acquire(f"reactions:{reaction.message.channel.id}")
+        page = [u.id async for u in reaction.users(limit=100, after=after)]
+        users.extend(page)
+        if len(page) < 100:
+            return reaction_dict(reaction.emoji, users)
+        after = discord.Object(id=page[-1])
+
+def reaction_summary(reaction) -> dict:
+    # Emoji and count as delivered with the message; no request needed
+    emoji_id, emoji_name = emoji_identity(reaction.emoji)
+    return reaction_count_entry(emoji_id, emoji_name, reaction.count, getattr(reaction, "burst_count", 0))
+
+async def hydrate_message_reactions(channel, message_id: int, pace) -> bool:
+    # Fetch the current reactions of a message stored with counts only and save them with user lists
+    await pace()
+    await route_limiter.acquire(f"messages:{channel.id}")
+    try:
+        message = await channel.fetch_message(message_id)
+    except discord.NotFound:
+        return False
+
+    emojis_list = []
+    for reaction in message.reactions:
+        emojis_list.append(await fetch_reaction_data(reaction, pace))
 
-async def prepare_message_data(message: discord.Message, db):
+    async with AsyncSessionLocal() as db:
+        updated = await set_message_reactions(db, message_id, emojis_list)
+    if updated:
+        filter_cache.bump_channel(channel.id)
+    return updated
+
+async def collect_reactions(message: discord.Message, reaction_mode: str = "immediate") -> list[dict]:
+    if reaction_mode == "immediate":
+        return list(await asyncio.gather(*[fetch_reaction_data(reaction) for reaction in message.reactions]))
+    return [reaction_summary(reaction) for reaction in message.reactions]
+
+async def prepare_message_data(message: discord.Message, db, reaction_mode: str = "immediate"):
     # 1) Upsert user
     saved_user = await user_helper_function(db, message.author)
 
@@ -157,8 +264,8 @@ async def prepare_message_data(message: discord.Message, db):
     # 3) Save embeds
     embeds_list = [embed.to_dict() for embed in message.embeds]
 
-    # 4) Save reactions
-    emojis_list = await asyncio.gather(*[fetch_reaction_data(reaction) for reaction in message.reactions])
+    # 4) Save reactions (user lists, or counts only)
+    emojis_list = await collect_reactions(message, reaction_mode)
 
     # 5) Detect message type
     raw_type = getattr(message, "type", None)
@@ -196,11 +303,12 @@ async def handle_message_save(message: discord.Message):
             # Prepare all message data
             msg_data = await prepare_message_data(message, db)
 
-            # Build message model
+            # Build message model and hand it to the batched writer
             message_model = build_message_model(message, msg_data)
 
-            await create_message(db, message_model)
-            print(f"Message {message.id} saved successfully.")
+            await ingest_queue.put(message_model)
+            schedule_attachment_downloads(message_model.id, message_model.channel_id, msg_data["attachments_list"])
+            print(f"Message {message.id} queued for saving.")
 
         except Exception as e:
             print(f"Error saving message: {e}")
@@ -210,11 +318,17 @@ async def handle_message_update(message: discord.Message):
     if not message or not message.author:
         return
 
+    await ingest_queue.ensure_flushed(message.id)
+
     async with AsyncSessionLocal() as db:
         try:
             # Prepare all message data
             msg_data = await prepare_message_data(message, db)
 
+            # Keep files we already have instead of downloading them again after the edit
+            existing_attachments = await get_message_attachments(db, [int(message.id)])
+            carry_over_downloads(msg_data["attachments_list"], existing_attachments.get(int(message.id)))
+
             updates = {
                 "content": message.content,
                 "edited_timestamp": getattr(message, "edited_at", datetime.utcnow()),
@@ -228,13 +342,20 @@ async def handle_message_update(message: discord.Message):
             if msg_data["referenced_message"]:
                 updates["referenced_message"] = msg_data["referenced_message"]
 
+            updates["pinned"] = bool(getattr(message, "pinned", False))
+            updates["flags"] = message_flags(message)
+            updates["fingerprint"] = message_fingerprint(message)
+
             # Save updates
-            await update_message(
+            updated = await update_message(
                 db,
                 message_id=int(message.id),
                 author_id=int(message.author.id),
                 updates=updates
             )
+            if updated:
+                filter_cache.bump_channel(updated.channel_id)
+                schedule_attachment_downloads(updated.id, updated.channel_id, msg_data["attachments_list"])
 
             print(f"Message {message.id} updated successfully.")
 
@@ -245,9 +366,12 @@ async def handle_message_delete(message: discord.Message):
     if not message or not message.author:
         return
 
+    await ingest_queue.ensure_flushed(message.id)
+
     async with AsyncSessionLocal() as db:
         try:
-            await delete_message(db, message_id=int(message.id), author_id=int(message.author.id))
+            if await delete_message(db, message_id=int(message.id), author_id=int(message.author.id)):
+                filter_cache.bump_channel(message.channel.id)
             print(f"Message {message.id} deleted successfully.")
         except Exception as e:
             print(f"Error deleting message: {e}")
@@ -256,201 +380,196 @@ async def handle_reaction_add(reaction: discord.Reaction, user: discord.User):
     if user.bot:
         return
 
-    async with AsyncSessionLocal() as db:
-        try:
-            db_user = await user_helper_function(db, user)
+    try:
+        # Buffer before awaiting anything, so a quick add/remove pair keeps its order
+        emoji_id, emoji_name = emoji_identity(reaction.emoji)
+        reaction_buffer.add(int(reaction.message.id), int(reaction.message.channel.id), emoji_id, emoji_name, int(user.id), added=True)
 
-            result = await db.execute(select(Message).filter(Message.id == reaction.message.id))
-            db_message = result.scalar_one_or_none()
-            if not db_message:
-                print(f"No message found in DB with ID {reaction.message.id}")
-                return
+        async with AsyncSessionLocal() as db:
+            await user_helper_function(db, user)
 
-            emoji_id = str(reaction.emoji.id) if hasattr(reaction.emoji, 'id') and reaction.emoji.id else None
-            emoji_name = str(reaction.emoji.name) if hasattr(reaction.emoji, 'name') else str(reaction.emoji)
+        print(f"Reaction added: emoji={emoji_name}, user={user.id}, message={reaction.message.id}")
 
-            reactions = db_message.reactions or []
+    except Exception as e:
+        print(f"Error adding reaction: {e}")
 
-            existing_reaction = None
-            for r in reactions:
-                r_emoji = r.get('emoji', {})
-                if (emoji_id and r_emoji.get('id') == emoji_id) or (not emoji_id and r_emoji.get('name') == emoji_name):
-                    existing_reaction = r
-                    break
 
-            if existing_reaction:
-                if 'users' not in existing_reaction:
-                    existing_reaction['users'] = []
-                if db_user.id not in existing_reaction['users']:
-                    existing_reaction['users'].append(db_user.id)
-                reactions[reactions.index(existing_reaction)] = reaction_dict(reaction.emoji, existing_reaction['users'])
-            else:
-                reactions.append(reaction_dict(reaction.emoji, [db_user.id]))
+async def handle_reaction_remove(reaction: discord.Reaction, user: discord.User):
+    if user.bot:
+        return
 
-            db_message.reactions = reactions
-            await db.commit()
-            await db.refresh(db_message)
+    try:
+        emoji_id, emoji_name = emoji_identity(reaction.emoji)
+        reaction_buffer.add(int(reaction.message.id), int(reaction.message.channel.id), emoji_id, emoji_name, int(user.id), added=False)
 
-            print(f"Reaction added: emoji={emoji_name}, user={user.id}, message={reaction.message.id}")
+        print(f"Reaction removed: emoji={emoji_name}, user={user.id}, message={reaction.message.id}")
 
-        except Exception as e:
-            print(f"Error adding reaction: {e}")
+    except Exception as e:
+        print(f"Error removing reaction: {e}")
+
+def apply_message_filters(query, filters: dict):
+    if filters.get("channels") and len(filters["channels"]) > 0:
+        channel_ids = []
+        for channel in filters["channels"]:
+            try:
+                channel_ids.append(int(channel))
+            except ValueError:
+                pass
+        if channel_ids:
+            query = query.filter(Message.channel_id.in_(channel_ids))
+    
+    if filters.get("members") and len(filters["members"]) > 0:
+        member_ids = []
+        for member in filters["members"]:
+            try:
+                member_ids.append(int(member))
+            except ValueError:
+                pass
+        if member_ids:
+            query = query.filter(Message.author_id.in_(member_ids))
+    
+    if filters.get("from_date"):
+        query = query.filter(Message.timestamp >= filters["from_date"])
+    if filters.get("to_date"):
+        query = query.filter(Message.timestamp <= filters["to_date"])
+    
+    if filters.get("reactions") and len(filters["reactions"]) > 0:
+        query = query.filter(has_any_reaction(filters["reactions"]))
+    
+    if filters.get("has_attachments") is True:
+        query = query.filter(has_attachment())
+    
+    if filters.get("attachment_name_contains"):
+        query = query.filter(attachment_name_contains(filters["attachment_name_contains"]))
 
+    return query
 
-async def handle_reaction_remove(reaction: discord.Reaction, user: discord.User):
-    if user.bot:
-        return
 
-    async with AsyncSessionLocal() as db:
-        try:
-            result = await db.execute(select(Message).filter(Message.id == reaction.message.id))
-            db_message = result.scalar_one_or_none()
+# The only columns /list renders. Selecting them from the table (not the entity) yields plain
+# Row tuples: no identity map, no Mutable wrappers, none of the unused JSON columns.
+MESSAGE_LIST_COLUMNS = [
+    Message.__table__.c[name]
+    for name in ("id", "channel_id", "author_id", "timestamp", "edited_timestamp", "content", "attachments", "reactions", "embeds")
+]
 
-            if not db_message:
-                print(f"No message found with ID {reaction.message.id}. Cannot remove reaction.")
-                return
 
-            if not db_message.reactions:
-                return
+async def load_message_rows(db, message_ids: list[int]) -> list:
+    # Projected rows for known ids, in the order given
+    result = await db.execute(select(*MESSAGE_LIST_COLUMNS).where(Message.id.in_(message_ids)))
+    rows = {row.id: row for row in result.all()}
+    return [rows[message_id] for message_id in message_ids if message_id in rows]
 
-            # 2) EXTRACT EMOJI INFO
-            emoji_id = str(reaction.emoji.id) if hasattr(reaction.emoji, 'id') and reaction.emoji.id else None
-            emoji_name = str(reaction.emoji.name) if hasattr(reaction.emoji, 'name') else str(reaction.emoji)
 
-            print(f"Emoji extracted: id={emoji_id}, name={emoji_name}")
+def build_filter_query(filters: dict, query=None, max_limit: int = LIST_MAX_LIMIT):
+    query = apply_message_filters(query if query is not None else select(*MESSAGE_LIST_COLUMNS), filters)
 
-            updated_reactions = []
+    sort_by = filters.get("sort_by", "desc")
+    if sort_by == "asc":
+        query = query.order_by(Message.timestamp.asc())
+    elif sort_by == "reactions_desc":
+        query = query.order_by(reaction_count.desc())
+    else:
+        query = query.order_by(Message.timestamp.desc())
+    
+    # Always bounded, whatever the user typed
+    limit = max(1, min(int(filters.get("limit") or 20), max_limit))
+    return query.limit(limit)
 
-            # 3) FIND AND UPDATE REACTION ENTRY
-            for r in db_message.reactions:
-                if r.get('emoji', {}).get('id') == emoji_id and r.get('emoji', {}).get('name') == emoji_name:
 
-                    if 'users' in r and int(user.id) in r['users']:
-                        print(f"[REMOVE] Removing user {user.id} from reaction...")
-                        r['users'].remove(int(user.id))
+async def stream_filter_results(filters: dict, message_ids: list[int] | None = None):
+    # Rows come from a server-side cursor in chunks, so memory does not grow with the result size
+    async with AsyncSessionLocal() as db:
+        if message_ids is not None:
+            # Known result ids (from the filter cache): load them by primary key, chunk by chunk
+            for i in range(0, len(message_ids), EXPORT_FETCH_SIZE):
+                for row in await load_message_rows(db, message_ids[i:i + EXPORT_FETCH_SIZE]):
+                    yield row
+            return
+
+        query = build_filter_query(filters, max_limit=EXPORT_MAX_LIMIT).execution_options(yield_per=EXPORT_FETCH_SIZE)
+        result = await db.stream(query)
+        async for row in result:
+            yield row
+
+def browse_sort_keys(sort_by: str) -> tuple[list, bool]:
+    # Keyset columns per /list sort order, ending in id so every row has a unique position
+    if sort_by == "asc":
+        return [Message.timestamp, Message.id], False
+    if sort_by == "reactions_desc":
+        return [reaction_count, Message.timestamp, Message.id], True
+    return [Message.timestamp, Message.id], True
+
+
+def browse_cursor(message, sort_by: str) -> tuple:
+    if sort_by == "reactions_desc":
+        count = len(message.reactions) if isinstance(message.reactions, list) else 0
+        return (count, message.timestamp, message.id)
+    return (message.timestamp, message.id)
+
+
+def build_page_query(filters: dict, after: tuple | None = None, before: tuple | None = None, page_size: int = LIST_PAGE_SIZE):
+    keys, descending = browse_sort_keys(filters.get("sort_by", "desc"))
+    query = apply_message_filters(select(*MESSAGE_LIST_COLUMNS), filters)
+
+    # Paging backwards flips both the comparison and the order; the caller reverses the rows
+    cursor = before if before is not None else after
+    walk_desc = descending != (before is not None)
+    if cursor is not None:
+        position, bound = tuple_(*keys), tuple_(*cursor)
+        query = query.where(position < bound if walk_desc else position > bound)
+
+    return query.order_by(*[key.desc() if walk_desc else key.asc() for key in keys]).limit(page_size + 1)
+
+
+async def fetch_filter_page(filters: dict, after: tuple | None = None, before: tuple | None = None, page_size: int = LIST_PAGE_SIZE):
+    """Return one page of messages after (or before) a cursor, and whether more rows lie in that direction."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(build_page_query(filters, after, before, page_size))
+        messages = list(result.all())
 
-                    r['count'] = len(r['users'])
-                    r['count_details']['normal'] = r['count']
+    has_more = len(messages) > page_size
+    messages = messages[:page_size]
+    if before is not None:
+        messages.reverse()
+    return messages, has_more
 
-                    if r['count'] > 0:
-                        updated_reactions.append(r)
-                else:
-                    updated_reactions.append(r)
 
-            # 4) SAVE TO DB
-            db_message.reactions = updated_reactions
-            await db.commit()
-            await db.refresh(db_message)
+def build_search_query(search_text: str, filters: dict, cursor: tuple[float, int] | None = None, page_size: int = SEARCH_PAGE_SIZE):
+    # Ranked full-text match on the content_tsv GIN index, newest id first among equal ranks
+    tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_TS_CONFIG}'::regconfig"), search_text)
+    rank = func.ts_rank_cd(Message.content_tsv, tsquery)
 
-            print("Reaction removed and DB updated successfully.")
+    # Only the newest matches are ranked, so very common terms cost a bounded amount of work
+    candidates = apply_message_filters(select(Message.id).where(Message.content_tsv.op("@@")(tsquery)), filters)
+    candidates = candidates.order_by(Message.id.desc()).limit(SEARCH_MAX_CANDIDATES).subquery()
 
-        except Exception as e:
-            print(f"Error removing reaction: {e}")
+    query = select(*MESSAGE_LIST_COLUMNS, rank.label("rank")).join(candidates, candidates.c.id == Message.id)
 
-async def filter_command(filters: dict):
+    # Keyset pagination: continue strictly after the last (rank, id) of the previous page
+    if cursor:
+        cursor_rank, cursor_id = cursor
+        query = query.where(tuple_(rank, Message.id) < tuple_(cast(cursor_rank, REAL), cursor_id))
+
+    return query.order_by(rank.desc(), Message.id.desc()).limit(page_size + 1)
 
-    async with AsyncSessionLocal() as db:
-        try:
-            query = select(Message)
-                        
-            if filters.get("channels") and len(filters["channels"]) > 0:
-                channel_ids = []
-                for channel in filters["channels"]:
-                    try:
-                        channel_ids.append(int(channel))
-                    except ValueError:
-                        pass
-                if channel_ids:
-                    query = query.filter(Message.channel_id.in_(channel_ids))
-            
-            if filters.get("members") and len(filters["members"]) > 0:
-                member_ids = []
-                for member in filters["members"]:
-                    try:
-                        member_ids.append(int(member))
-                    except ValueError:
-                        pass
-                if member_ids:
-                    query = query.filter(Message.author_id.in_(member_ids))
-            
-            if filters.get("from_date"):
-                query = query.filter(Message.timestamp >= filters["from_date"])
-            if filters.get("to_date"):
-                query = query.filter(Message.timestamp <= filters["to_date"])
-            
-            if filters.get("has_attachments") is True:
-                query = query.filter(func.json_array_length(Message.attachments) > 0)
-            
-            if filters.get("attachment_name_contains"):
-                search_term = filters["attachment_name_contains"]
-                query = query.filter(
-                    func.cast(Message.attachments, String).ilike(f"%{search_term}%")
-                )
-            
-            sort_by = filters.get("sort_by", "desc")
-            if sort_by == "asc":
-                query = query.order_by(Message.timestamp.asc())
-            elif sort_by == "reactions_desc":
-                query = query.order_by(func.json_array_length(Message.reactions).desc())
-            else:
-                query = query.order_by(Message.timestamp.desc())
-            
-            limit = filters.get("limit", 20)
-            
-            if not (filters.get("reactions") and len(filters["reactions"]) > 0):
-                query = query.limit(limit)
-            
-            result = await db.execute(query)
-            messages = result.scalars().all()
-            
-            if filters.get("reactions") and len(filters["reactions"]) > 0:
-                filtered_messages = []
-                
-                for msg in messages:
-                    if msg.reactions:  
-                        for emoji_input in filters["reactions"]:
-                            emoji_found = False
-                            
-                            for reaction in msg.reactions:
-                                reaction_emoji = reaction.get('emoji', {})
-                                reaction_emoji_name = reaction_emoji.get('name', '')
-
-                                if reaction_emoji_name == emoji_input:
-                                    emoji_found = True
-                                    break
-                            
-                            if emoji_found:
-                                filtered_messages.append(msg)
-                                break
-                
-                messages = filtered_messages[:limit]
-            
-            return messages
-            
-        except Exception as e:
-            return []
 
-async def get_latest_message_in_channel(channel_id: int) -> Message| None:
+async def search_messages(search_text: str, filters: dict, cursor: tuple[float, int] | None = None, page_size: int = SEARCH_PAGE_SIZE):
+    """Return one page of message rows (with their rank) and the cursor of the next page, or None on the last page."""
     async with AsyncSessionLocal() as db:
-        try:
-            result = await db.execute(
-                select(Message)
-                .where(Message.channel_id == channel_id)
-                .order_by(Message.timestamp.desc())
-                .limit(1)
-            )
-            message = result.scalar_one_or_none()
-            if message:
-                print('Latest message ID fetched from DB:', message.id)
-                return message.id
-            return None
-        except Exception as e:
-            print(f"Error fetching latest message in channel {channel_id}: {e}")
-            return None
+        result = await db.execute(build_search_query(search_text, filters, cursor, page_size))
+        rows = result.all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1].rank, rows[-1].id)
+    return rows, next_cursor
+
 
 async def fetch_discord_history(channel, message_id=None, backfill=False):
     messages = []
     try:
+        await route_limiter.acquire(f"messages:{channel.id}")
         if backfill:
             print('fetching discord history before last message...')
             async for message in channel.history(limit=100, before=discord.Object(id=message_id) if message_id else None):
@@ -458,84 +577,170 @@ async def fetch_discord_history(channel, message_id=None, backfill=False):
             return messages
         
         print('fetching discord history after last message...')
-        async for message in channel.history(limit=100, after=discord.Object(id=message_id) if message_id else None):
+        # Without a cursor, start from the beginning of the channel
+        async for message in channel.history(limit=100, after=discord.Object(id=message_id) if message_id else None, oldest_first=True):
             messages.append(message)
         return messages
     except Exception as e:
+        # Re-raised so a failed page is not mistaken for the end of the history
         print(f"Error fetching discord history: {e}")
-        return []
-
-async def reconcile_channel(channel: discord.TextChannel, backfill: bool):
+        raise
+
+async def history_pages(channel, message_id=None, backfill=False):
+    # Pages of up to 100 messages, walking away from `message_id` until Discord has no more
+    while True:
+        messages = await fetch_discord_history(channel, message_id, backfill=backfill)
+        if not messages:
+            return
+        yield messages
+        message_id = messages[-1].id
+
+
+async def prepare_page(messages: list[discord.Message], concurrency: int = RECONCILE_PREPARE_CONCURRENCY,
+                       reaction_mode: str = "immediate") -> list[dict]:
+    # Prepare a page's messages concurrently (reaction users, replies, ...), each task with its own session
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    # Replies often target a message on the same page, which is not stored yet
+    page_messages = {msg.id: msg for msg in messages}
+    for msg in messages:
+        target = page_messages.get(getattr(getattr(msg, "reference", None), "message_id", None))
+        if target:
+            reference_resolver.remember_message(target)
+
+    async def prepare(msg):
+        async with semaphore:
+            async with AsyncSessionLocal() as task_db:
+                return await prepare_message_data(msg, task_db, reaction_mode)
+
+    return await asyncio.gather(*[prepare(msg) for msg in messages])
+
+
+async def collect_changed_columns(messages: list[discord.Message], parts_by_id: dict[int, list[str]],
+                                  reaction_mode: str = "immediate",
+                                  concurrency: int = RECONCILE_PREPARE_CONCURRENCY) -> dict[int, dict]:
+    # New values of only the columns behind each message's changed fingerprint parts
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def collect(msg):
+        parts = parts_by_id[msg.id]
+        values = {"fingerprint": message_fingerprint(msg)}
+        if "content" in parts:
+            values["content"] = msg.content
+            values["edited_timestamp"] = getattr(msg, "edited_at", None)
+        if "attachments" in parts:
+            values["attachments"] = await extract_attachments(msg)
+        if "embeds" in parts:
+            values["embeds"] = [embed.to_dict() for embed in msg.embeds]
+        if "flags" in parts:
+            values["pinned"] = bool(getattr(msg, "pinned", False))
+            values["flags"] = message_flags(msg)
+        if "reactions" in parts:
+            async with semaphore:
+                values["reactions"] = await collect_reactions(msg, reaction_mode)
+        return msg.id, values
+
+    return dict(await asyncio.gather(*[collect(msg) for msg in messages]))
+
+
+async def persist_history_page(db, channel: discord.TextChannel, messages: list[discord.Message],
+                               reaction_mode: str = RECONCILE_REACTION_MODE):
+    # Upsert all distinct authors of this page up front
+    upserted_authors = await upsert_authors(db, [msg.author for msg in messages if msg.author])
+    if upserted_authors:
+        print(f"Upserted {upserted_authors} authors")
+    
+    # Compare the page with the stored fingerprints; unchanged messages are not touched
+    message_ids = [msg.id for msg in messages]
+    stored_fingerprints = await get_message_fingerprints(db, message_ids)
+    new_msgs = [msg for msg in messages if msg.id not in stored_fingerprints]
+    parts_by_id = {}
+    for msg in messages:
+        if msg.id in stored_fingerprints:
+            parts = changed_parts(stored_fingerprints[msg.id], message_fingerprint(msg))
+            if parts:
+                parts_by_id[msg.id] = parts
+    changed_msgs = [msg for msg in messages if msg.id in parts_by_id]
+    existing_attachments = await get_message_attachments(db, [
+        message_id for message_id, parts in parts_by_id.items() if "attachments" in parts
+    ])
+
+    # End the read transaction so no pooled connection idles through the Discord requests below
+    await db.commit()
+
+    prepared = await prepare_page(new_msgs, reaction_mode=reaction_mode)
+    new_messages = [build_message_model(msg, msg_data) for msg, msg_data in zip(new_msgs, prepared)]
+    updates = await collect_changed_columns(changed_msgs, parts_by_id, reaction_mode)
+
+    # Keep files we already have for messages whose attachments changed
+    for message_id, attachments in existing_attachments.items():
+        carry_over_downloads(updates[message_id]["attachments"], attachments)
+    
+    # Inserts, updates and the sync checkpoint commit together
+    inserted = 0
+    if new_messages:
+        inserted, skipped = await batch_create_messages(db, new_messages, commit=False)
+        print(f"Batch inserted {inserted} new messages ({skipped} already stored)")
+    if updates:
+        await batch_update_message_columns(db, updates)
+        print(f"Batch updated {len(updates)} changed messages ({len(messages) - len(new_msgs) - len(updates)} unchanged)")
+    await advance_sync_state(db, channel.id, message_ids)
+    await db.commit()
+
+    if inserted or updates:
+        filter_cache.bump_channel(channel.id)
+    for new_message in new_messages:
+        schedule_attachment_downloads(new_message.id, channel.id, new_message.attachments)
+    for message_id, values in updates.items():
+        if "attachments" in values:
+            schedule_attachment_downloads(message_id, channel.id, values["attachments"])
+    if reaction_mode == "full":
+        for msg in new_msgs + changed_msgs:
+            if msg.reactions and (msg.id not in parts_by_id or "reactions" in parts_by_id[msg.id]):
+                reaction_hydrator.enqueue(channel, msg.id)
+
+
+async def reconcile_channel(channel: discord.TextChannel, backfill: bool, on_page=None, queue_depth: int = RECONCILE_QUEUE_DEPTH,
+                            reaction_mode: str = RECONCILE_REACTION_MODE):
     try:
         start_time = time.time()
-        latest_message_id = await get_latest_message_in_channel(channel.id)
-        
-        async with AsyncSessionLocal() as db:            
-            while True:
-                messages = await fetch_discord_history(channel, latest_message_id, backfill=backfill)
-
-                if not messages:
-                    break
-
+        if reaction_mode not in ("immediate", "counts", "full"):
+            raise ValueError(f"Unknown reaction mode: {reaction_mode}")
+
+        # Forward runs continue after the newest synced message, backfills before the oldest
+        references_before = reference_resolver.stats()
+        async with AsyncSessionLocal() as db:
+            state = await get_sync_state(db, channel.id)
+            await mark_sync_run(db, channel.id, backfill, complete=False)
+        cursor = (state.low_water_id if backfill else state.high_water_id) if state else None
+
+        # Discord pages are fetched ahead into a bounded queue while earlier pages are written;
+        # a depth of 0 fetches each page only after the previous one is stored
+        pages = history_pages(channel, cursor, backfill=backfill)
+        if queue_depth > 0:
+            pages = prefetch(pages, queue_depth)
+
+        async with AsyncSessionLocal() as db:
+            async for messages in pages:
                 print(f"Fetched {len(messages)} messages from Discord")
-                
-                # Get all message IDs for batch lookup
-                message_ids = [msg.id for msg in messages]
-                existing_messages = await get_messages_batch(db, message_ids)
-                
-                # Separate into new messages and messages to update
-                new_messages = []
-                updates_list = []
-                
-                for msg in messages:
-                    existing_msg = existing_messages.get(msg.id)
-                    
-                    if existing_msg:
-                        # Check if message was edited
-                        if msg.edited_at != existing_msg.edited_timestamp:
-                            # Prepare message data
-                            msg_data = await prepare_message_data(msg, db)
-                            
-                            updates = {
-                                "content": msg.content,
-                                "edited_timestamp": getattr(msg, "edited_at", datetime.utcnow()),
-                                "attachments": msg_data["attachments_list"],
-                                "embeds": msg_data["embeds_list"],
-                                "reactions": msg_data["emojis_list"],
-                            }
-                            
-                            if msg_data["message_reference"]:
-                                updates["message_reference"] = msg_data["message_reference"]
-                            if msg_data["referenced_message"]:
-                                updates["referenced_message"] = msg_data["referenced_message"]
-                            
-                            updates_list.append((existing_msg, updates))
-                            print(f"Updated message in DB: {msg.id}")
-                    else:
-                        # Prepare message data
-                        msg_data = await prepare_message_data(msg, db)
-                        
-                        # Build and append new message model
-                        new_messages.append(build_message_model(msg, msg_data))
-                
-                # Batch insert new messages
-                if new_messages:
-                    await batch_create_messages(db, new_messages)
-                    print(f"Batch inserted {len(new_messages)} new messages")
-                
-                # Batch update existing messages
-                if updates_list:
-                    await batch_update_messages(db, updates_list)
-                    print(f"Batch updated {len(updates_list)} messages")
-                
-                latest_message_id = messages[-1].id
-                print('going to sleep')
-                await asyncio.sleep(0.05)
+                await persist_history_page(db, channel, messages, reaction_mode)
+                if on_page:
+                    on_page(len(messages))
+
+            # The walk ran out of pages: this direction is caught up
+            await mark_sync_run(db, channel.id, backfill, complete=True)
+            if not backfill and cursor is None:
+                # A first forward run starts at the channel's first message, so nothing older is missing
+                await mark_sync_run(db, channel.id, True, complete=True)
 
-            
             print(f'channel reconciled successfully. Time taken: {format_elapsed_time(start_time)}')
+            print(f"Reply references: {reference_resolver.report(references_before)}")
+            if reaction_mode == "full":
+                print(f"Reaction hydrator: {reaction_hydrator.stats()}")
+            return True
     except Exception as e:
         print(f"Error reconciling channel {channel.id}: {e}")
+        return False
 
 
 async def bulk_messages_create(messages_data: list[Message]):
@@ -543,13 +748,15 @@ async def bulk_messages_create(messages_data: list[Message]):
         try:
             batch_size = 100
             total_inserted = 0
+            total_skipped = 0
             
             for i in range(0, len(messages_data), batch_size):
                 batch = messages_data[i:i + batch_size]
-                await batch_create_messages(db, batch)
-                total_inserted += len(batch)
+                inserted, skipped = await batch_create_messages(db, batch)
+                total_inserted += inserted
+                total_skipped += skipped
                 print(f"Inserted {total_inserted}/{len(messages_data)} messages")
             
-            print(f"Bulk creation completed. Total messages inserted: {total_inserted}")
+            print(f"Bulk creation completed. Total messages inserted: {total_inserted}, skipped: {total_skipped}")
         except Exception as e:
             print(f"Error in bulk message creation: {e}")
\ No newline at end of file
@@ -0,0 +1,103 @@
+import time
+import discord
+from datetime import datetime, timedelta, timezone
+from db.connection import AsyncSessionLocal
+from db.queries.deletion_scan import get_id_bucket_digests, get_channel_ids_in_range, delete_messages_by_ids
+from bot.utils.filter_cache import filter_cache
+from bot.utils.rate_limiter import route_limiter
+from bot.utils.response_time import format_elapsed_time
+from bot.config.settings import DELETION_SCAN_DAYS, DELETION_SCAN_BUCKET_HOURS
+
+
+class DiscordIdWindow:
+    """Forward walk over a channel's message ids, one history page at a time.
+
+    Ranges must be requested in increasing order. A page that runs past the
+    end of one range is kept for the next, and a range that starts beyond
+    what has been fetched starts a new walk there, so stretches without
+    archived messages are never paged through.
+    """
+
+    def __init__(self, channel: discord.TextChannel, max_id: int):
+        self.channel = channel
+        self.max_id = max_id
+        self.known_from = 0
+        self.known_to = 0
+        self.ids: list[int] = []
+        self.pages = 0
+
+    async def ids_in(self, start: int, end: int) -> list[int]:
+        # Everything in (known_from, known_to] is in self.ids
+        if not self.known_from < start <= self.known_to + 1:
+            self.known_from = self.known_to = start - 1
+            self.ids = []
+
+        while self.known_to < end - 1:
+            await route_limiter.acquire(f"messages:{self.channel.id}")
+            page = [message.id async for message in self.channel.history(
+                limit=100, after=discord.Object(id=self.known_to), oldest_first=True
+            )]
+            self.pages += 1
+            self.ids.extend(message_id for message_id in page if message_id < self.max_id)
+            # A short page means the history ends here
+            self.known_to = page[-1] if len(page) == 100 else self.max_id
+
+        found = [message_id for message_id in self.ids if start <= message_id < end]
+        self.ids = [message_id for message_id in self.ids if message_id >= end]
+        self.known_from = end - 1
+        return found
+
+
+async def scan_channel_deletions(channel: discord.TextChannel, days: int = DELETION_SCAN_DAYS,
+                                 bucket_hours: float = DELETION_SCAN_BUCKET_HOURS, dry_run: bool = False) -> dict:
+    """Find archived messages of `channel` that no longer exist on Discord and delete them.
+
+    The archived ids of the last `days` days (all of them for 0) are grouped
+    into buckets of `bucket_hours`. Only buckets holding archived messages
+    are read from Discord, and only buckets whose (count, sum of ids)
+    digest differs have their ids loaded and compared. The missing ids are
+    deleted in one statement at the end.
+    """
+    # Messages posted while the scan runs are out of its range
+    max_id = discord.utils.time_snowflake(datetime.now(timezone.utc))
+    min_id = discord.utils.time_snowflake(datetime.now(timezone.utc) - timedelta(days=days)) if days else 0
+    # Snowflakes carry milliseconds above 22 bits of worker/sequence data
+    width = int(bucket_hours * 3600 * 1000) << 22
+    return await scan_deletions_in_range(channel, min_id, max_id, width, dry_run)
+
+
+async def scan_deletions_in_range(channel: discord.TextChannel, min_id: int, max_id: int, width: int, dry_run: bool = False) -> dict:
+    start_time = time.time()
+    async with AsyncSessionLocal() as db:
+        digests = await get_id_bucket_digests(db, channel.id, width, min_id, max_id)
+
+    window = DiscordIdWindow(channel, max_id)
+    missing = []
+    differing = 0
+    for bucket, (count, total) in digests.items():
+        start, end = max(bucket * width, min_id), min((bucket + 1) * width, max_id)
+        discord_ids = await window.ids_in(start, end)
+        if (len(discord_ids), sum(discord_ids)) == (count, total):
+            continue
+
+        differing += 1
+        async with AsyncSessionLocal() as db:
+            archived_ids = await get_channel_ids_in_range(db, channel.id, start, end)
+        present = set(discord_ids)
+        missing.extend(message_id for message_id in archived_ids if message_id not in present)
+
+    deleted = 0
+    if missing and not dry_run:
+        async with AsyncSessionLocal() as db:
+            deleted = await delete_messages_by_ids(db, channel.id, missing)
+        filter_cache.bump_channel(channel.id)
+
+    result = {
+        "buckets": len(digests),
+        "differing": differing,
+        "pages": window.pages,
+        "missing": len(missing),
+        "deleted": deleted,
+    }
+    print(f"Deletion scan of channel {channel.id}: {result}. Time taken: {format_elapsed_time(start_time)}")
+    return result
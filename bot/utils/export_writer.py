@@ -0,0 +1,297 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from bot.config.settings import EXPORT_SPOOL_SIZE, EXPORT_FETCH_SIZE
+from bot.utils.db_handler import stream_filter_results
+from bot.utils.filter_cache import filter_cache, filters_key
+
+# Discord's default upload limit for guilds without boosts
+DEFAULT_UPLOAD_LIMIT = 10 * 1024 * 1024
+
+
+class TextExportWriter:
+    """Renders /list results as plain text into a spooled temp file, one message at a time."""
+
+    extension = "txt"
+
+    def __init__(self):
+        self.file = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE, mode="w+b")
+        self.count = 0
+
+    def _write(self, text: str):
+        self.file.write(text.encode("utf-8"))
+
+    def write_header(self, filters: dict):
+        self._write("".join([
+            "FILTERS APPLIED:\n\n",
+            f"Channels: {', '.join(filters['channels']) if filters['channels'] else 'All channels'}\n",
+            f"Members: {', '.join(filters['members']) if filters['members'] else 'All members'}\n",
+            f"Reactions: {', '.join(filters['reactions']) if filters['reactions'] else 'All reactions'}\n",
+            f"From Date: {filters['from_date'].strftime('%Y-%m-%d %H:%M:%S') if filters['from_date'] else 'Not set'}\n",
+            f"To Date: {filters['to_date'].strftime('%Y-%m-%d %H:%M:%S') if filters['to_date'] else 'Not set'}\n",
+            f"Has Attachments: {filters['has_attachments']}\n",
+            f"Sort By: {filters['sort_by']}\n",
+            "\n", "=" * 80, "\n\n",
+        ]))
+
+    def write_message(self, msg):
+        self.count += 1
+        parts = [
+            f"MESSAGE {self.count}\n",
+            "-" * 80 + "\n",
+            f"Message ID: {msg.id}\n",
+            f"Channel ID: {msg.channel_id}\n",
+            f"Author ID: {msg.author_id}\n",
+            f"Timestamp: {msg.timestamp}\n",
+        ]
+
+        if msg.edited_timestamp:
+            parts.append(f"Edited Timestamp: {msg.edited_timestamp}\n")
+
+        parts.append("\nContent:\n")
+        parts.append(f"{msg.content if msg.content else '(No content)'}\n")
+
+        if msg.attachments and len(msg.attachments) > 0:
+            parts.append(f"\nAttachments ({len(msg.attachments)}):\n")
+            for att in msg.attachments:
+                parts.append(f"  - {att.get('filename', 'Unknown')} ({att.get('size', '?')} bytes)\n")
+                parts.append(f"    URL: {att.get('url', 'N/A')}\n")
+                parts.append(f"    Local Path: {att.get('local_path', 'Not downloaded')}\n")
+
+        if msg.reactions and len(msg.reactions) > 0:
+            parts.append(f"\nReactions ({len(msg.reactions)}):\n")
+            for reaction in msg.reactions:
+                emoji_name = reaction.get('emoji', {}).get('name', 'Unknown')
+                count = reaction.get('count', 0)
+                parts.append(f"  - {emoji_name} x{count}\n")
+
+        if msg.embeds and len(msg.embeds) > 0:
+            parts.append(f"\nEmbeds ({len(msg.embeds)}):\n")
+            for embed in msg.embeds:
+                parts.append(f"  - Title: {embed.get('title', 'No title')}\n")
+                parts.append(f"    Description: {embed.get('description', 'No description')}\n")
+
+        parts.append("\n\n")
+        self._write("".join(parts))
+
+    def write_footer(self):
+        self._write(f"{'=' * 80}\nTotal Results: {self.count} messages\n")
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def message_record(msg) -> dict:
+    """Flat, typed view of one message shared by the structured export formats."""
+    attachments = msg.attachments or []
+    reactions = [
+        {"emoji": (reaction.get('emoji') or {}).get('name'), "count": int(reaction.get('count') or 0)}
+        for reaction in msg.reactions or []
+    ]
+    return {
+        "id": int(msg.id),
+        "channel_id": int(msg.channel_id),
+        "author_id": int(msg.author_id) if msg.author_id is not None else None,
+        "timestamp": msg.timestamp,
+        "edited_timestamp": msg.edited_timestamp,
+        "content": msg.content,
+        "attachment_count": len(attachments),
+        "attachment_filenames": [att.get('filename') for att in attachments],
+        "reaction_count": sum(reaction["count"] for reaction in reactions),
+        "reactions": reactions,
+        "embed_count": len(msg.embeds or []),
+    }
+
+
+class CsvExportWriter(TextExportWriter):
+    extension = "csv"
+    columns = [
+        "id", "channel_id", "author_id", "timestamp", "edited_timestamp", "content",
+        "attachment_count", "attachment_filenames", "reaction_count", "reactions", "embed_count",
+    ]
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer)
+
+    def _write_row(self, row: list):
+        self._csv.writerow(row)
+        self._write(self._buffer.getvalue())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def write_header(self, filters: dict):
+        self._write_row(self.columns)
+
+    def write_message(self, msg):
+        self.count += 1
+        record = message_record(msg)
+        record["timestamp"] = _iso(record["timestamp"])
+        record["edited_timestamp"] = _iso(record["edited_timestamp"])
+        record["attachment_filenames"] = ";".join(name or "" for name in record["attachment_filenames"])
+        record["reactions"] = ";".join(f"{reaction['emoji']}:{reaction['count']}" for reaction in record["reactions"])
+        self._write_row([record[column] for column in self.columns])
+
+    def write_footer(self):
+        pass
+
+
+class JsonlExportWriter(TextExportWriter):
+    extension = "jsonl"
+
+    def write_header(self, filters: dict):
+        pass
+
+    def write_message(self, msg):
+        self.count += 1
+        record = message_record(msg)
+        record["timestamp"] = _iso(record["timestamp"])
+        record["edited_timestamp"] = _iso(record["edited_timestamp"])
+        self._write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_footer(self):
+        pass
+
+
+class ParquetExportWriter(TextExportWriter):
+    """Columnar export; rows are buffered and written one record batch at a time."""
+
+    extension = "parquet"
+
+    def __init__(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ModuleNotFoundError as e:
+            raise RuntimeError("Parquet export needs 'pyarrow'. Install it in your venv: pip install pyarrow") from e
+
+        super().__init__()
+        self._pa = pa
+        self.schema = pa.schema([
+            ("id", pa.int64()),
+            ("channel_id", pa.int64()),
+            ("author_id", pa.int64()),
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+            ("edited_timestamp", pa.timestamp("us", tz="UTC")),
+            ("content", pa.string()),
+            ("attachment_count", pa.int32()),
+            ("attachment_filenames", pa.list_(pa.string())),
+            ("reaction_count", pa.int64()),
+            ("reactions", pa.list_(pa.struct([("emoji", pa.string()), ("count", pa.int32())]))),
+            ("embed_count", pa.int32()),
+        ])
+        self._sink = pa.PythonFile(self.file, mode="w")
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+        self._rows: list[dict] = []
+
+    def write_header(self, filters: dict):
+        pass
+
+    def write_message(self, msg):
+        self.count += 1
+        self._rows.append(message_record(msg))
+        if len(self._rows) >= EXPORT_FETCH_SIZE:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        if self._rows:
+            self._writer.write_batch(self._pa.RecordBatch.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+    def write_footer(self):
+        self._flush_rows()
+        self._writer.close()
+
+
+EXPORT_WRITERS = {
+    "txt": TextExportWriter,
+    "csv": CsvExportWriter,
+    "jsonl": JsonlExportWriter,
+    "parquet": ParquetExportWriter,
+}
+
+
+class ExportResult:
+    def __init__(self, file, filename: str, count: int, size: int, compressed: bool):
+        self.file = file
+        self.filename = filename
+        self.count = count
+        self.size = size
+        self.compressed = compressed
+
+    def close(self):
+        self.file.close()
+
+
+def _gzip_spooled(source) -> tempfile.SpooledTemporaryFile:
+    target = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE, mode="w+b")
+    source.seek(0)
+    with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=6) as gz:
+        shutil.copyfileobj(source, gz, 1024 * 1024)
+    source.close()
+    return target
+
+
+async def render_export(filters: dict, message_ids: list[int] | None = None):
+    """Write all results into a new export writer; returns it with the ids of the rows written."""
+    writer = EXPORT_WRITERS.get(filters.get("format") or "txt", TextExportWriter)()
+    writer.write_header(filters)
+    written_ids = []
+
+    try:
+        async for msg in stream_filter_results(filters, message_ids):
+            written_ids.append(msg.id)
+            try:
+                writer.write_message(msg)
+            except Exception as msg_err:
+                print(f"Error processing message ID {msg.id}: {msg_err}")
+        writer.write_footer()
+    except Exception:
+        writer.file.close()
+        raise
+
+    return writer, written_ids
+
+
+async def export_filter_results(filters: dict, upload_limit: int = DEFAULT_UPLOAD_LIMIT) -> ExportResult:
+    key = filters_key("export", filters)
+    cached = filter_cache.get(key, filters)
+    extension = EXPORT_WRITERS.get(filters.get("format") or "txt", TextExportWriter).extension
+
+    if cached and cached.export is not None:
+        # Same filters, nothing changed since: reuse the rendered file
+        file = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE, mode="w+b")
+        file.write(cached.export)
+        count = len(cached.message_ids)
+    else:
+        versions = filter_cache.versions_for(filters)
+        writer, written_ids = await render_export(filters, cached.message_ids if cached else None)
+        file = writer.file
+        count = writer.count
+
+        export = None
+        if file.tell() <= filter_cache.max_export_bytes:
+            file.seek(0)
+            export = file.read()
+        filter_cache.put(key, versions, written_ids, export)
+
+    filename = f"messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    size = file.tell()
+    compressed = False
+
+    # Too big to upload as-is: gzip it (off the event loop)
+    if size > upload_limit:
+        file = await asyncio.to_thread(_gzip_spooled, file)
+        size = file.tell()
+        filename += ".gz"
+        compressed = True
+
+    file.seek(0)
+    return ExportResult(file, filename, count, size, compressed)
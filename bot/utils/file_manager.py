@@ -1,49 +1,155 @@
 import aiohttp
+import asyncio
+import hashlib
 import os
+import shutil
+import uuid
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import urlsplit
+from bot.config.settings import DOWNLOAD_CONCURRENCY, DOWNLOAD_PER_HOST_CONCURRENCY, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_TIMEOUT
 
 ATTACHMENTS_DIR = Path(__file__).parent.parent / "attachments"
 ATTACHMENTS_DIR.mkdir(exist_ok=True)
 
-async def download_attachment(url: str, filename: str, message_id: int) -> tuple[str, bool]:
-    try:
-        # Create message-specific directory
-        msg_dir = ATTACHMENTS_DIR / f"msg_{message_id}"
-        msg_dir.mkdir(exist_ok=True)
-        
-        # Create safe filename
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in "._-")
-        if not safe_filename:
-            safe_filename = f"attachment_{datetime.now().timestamp()}"
-        
-        local_path = msg_dir / safe_filename
-        
-        # Download file
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                if response.status == 200:
-                    with open(local_path, 'wb') as f:
-                        f.write(await response.read())
-                    
-                    print(f"✓ Downloaded: {filename} -> {local_path}")
-                    return str(local_path), True
-                else:
-                    print(f"✗ Failed to download {filename}: HTTP {response.status}")
-                    return "", False
-    
-    except Exception as e:
-        print(f"✗ Error downloading {filename}: {str(e)}")
-        return "", False
-
-def get_attachment_path(message_id: int, filename: str) -> Path:
-    msg_dir = ATTACHMENTS_DIR / f"msg_{message_id}"
+# Content-addressed layout: blobs/ab/cd/<sha256>
+BLOBS_DIR = ATTACHMENTS_DIR / "blobs"
+TMP_DIR = ATTACHMENTS_DIR / "tmp"
+
+
+def blob_path(sha256: str) -> Path:
+    return BLOBS_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def store_blob(tmp_path: Path, sha256: str) -> Path:
+    # Move a fully written temp file into the store, dropping it if the content is already there
+    target = blob_path(sha256)
+    if target.exists():
+        tmp_path.unlink(missing_ok=True)
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+    return target
+
+
+def copy_blob(source: Path, sha256: str) -> Path:
+    # Copy a file into the store, leaving the source in place; the copy is renamed in once complete
+    target = blob_path(sha256)
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{sha256}.{uuid.uuid4().hex}.part")
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    return target
+
+
+def hash_file(path: Path) -> tuple[str, int]:
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def _write_chunk(file, hasher, chunk: bytes):
+    hasher.update(chunk)
+    file.write(chunk)
+
+
+def safe_attachment_filename(filename: str) -> str:
     safe_filename = "".join(c for c in filename if c.isalnum() or c in "._-")
-    return msg_dir / safe_filename
-
-def get_attachment_size(local_path: str) -> int:
-    """Get the size of a locally stored file"""
-    try:
-        return os.path.getsize(local_path)
-    except:
-        return 0
+    if not safe_filename:
+        safe_filename = f"attachment_{datetime.now().timestamp()}"
+    return safe_filename
+
+
+class AttachmentDownloader:
+    """Long-lived attachment downloader.
+
+    Shares one pooled ClientSession, caps concurrent downloads globally and
+    per host, streams bodies to disk in chunks off the event loop while
+    hashing them, and files the result in the content-addressed store.
+    Background download tasks are tracked so they can be drained on shutdown.
+    """
+
+    def __init__(self, concurrency: int = DOWNLOAD_CONCURRENCY, per_host: int = DOWNLOAD_PER_HOST_CONCURRENCY):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self._session: aiohttp.ClientSession | None = None
+        self._global_limit = asyncio.Semaphore(concurrency)
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT),
+            )
+        return self._session
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def download(self, url: str, filename: str) -> tuple[str, str | None, int]:
+        """Download `url` into the blob store. Returns (local_path, sha256, size); sha256 is None on failure."""
+        tmp_path = TMP_DIR / f"{uuid.uuid4().hex}.part"
+
+        try:
+            async with self._global_limit, self._host_limit(url):
+                async with self._get_session().get(url) as response:
+                    if response.status != 200:
+                        print(f"✗ Failed to download {filename}: HTTP {response.status}")
+                        return "", None, 0
+
+                    await asyncio.to_thread(TMP_DIR.mkdir, exist_ok=True)
+                    hasher = hashlib.sha256()
+                    size = 0
+                    file = await asyncio.to_thread(open, tmp_path, 'wb')
+                    try:
+                        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                            await asyncio.to_thread(_write_chunk, file, hasher, chunk)
+                            size += len(chunk)
+                    finally:
+                        await asyncio.to_thread(file.close)
+
+            sha256 = hasher.hexdigest()
+            local_path = await asyncio.to_thread(store_blob, tmp_path, sha256)
+            print(f"✓ Downloaded: {filename} -> {local_path}")
+            return str(local_path), sha256, size
+
+        except Exception as e:
+            print(f"✗ Error downloading {filename}: {str(e)}")
+            try:
+                await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+            except OSError:
+                pass
+            return "", None, 0
+
+    def schedule(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def close(self, timeout: float = 30):
+        if self._tasks:
+            print(f"Waiting for {len(self._tasks)} attachment downloads to finish...")
+            _, still_running = await asyncio.wait(set(self._tasks), timeout=timeout)
+            for task in still_running:
+                task.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+
+attachment_downloader = AttachmentDownloader()
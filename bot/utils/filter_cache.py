@@ -0,0 +1,149 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from bot.config.settings import FILTER_CACHE_SIZE, FILTER_CACHE_TTL, FILTER_CACHE_MAX_EXPORT_BYTES, FILTER_CACHE_MAX_BYTES
+
+# Rough cost of one cached id: a Python int plus its list slot
+BYTES_PER_ID = 36
+
+
+def _canonical(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return sorted(str(item) for item in value)
+    return value
+
+
+def filters_key(scope: str, filters: dict) -> str:
+    """Stable hash of a filters dict: list order, key order and empty values do not matter."""
+    canonical = {key: _canonical(value) for key, value in filters.items() if value not in (None, "", [], False)}
+    payload = json.dumps([scope, canonical], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    versions: tuple
+    created_at: float
+    message_ids: list[int]
+    export: bytes | None = None
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.message_ids) * BYTES_PER_ID + len(self.export or b"")
+
+
+class FilterCache:
+    """LRU + TTL cache of /list results keyed by the canonical hash of the filters.
+
+    Every entry remembers the data versions it was computed from: the
+    versions of the channels it filters on, or the global version when it
+    spans all channels. Writers bump those versions after they commit, so
+    an entry is served only while nothing it depends on has changed.
+
+    Besides the entry count, the cache holds at most `max_bytes` (estimated)
+    of ids and exports, and results over an eighth of that are not cached.
+    """
+
+    def __init__(self, maxsize: int = FILTER_CACHE_SIZE, ttl: float = FILTER_CACHE_TTL,
+                 max_export_bytes: int = FILTER_CACHE_MAX_EXPORT_BYTES, max_bytes: int = FILTER_CACHE_MAX_BYTES):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.ttl = ttl
+        self.max_export_bytes = max_export_bytes
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self._global_version = 0
+        self._channel_versions: dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+        self.too_large = 0
+
+    def bump_channel(self, channel_id: int | None):
+        if channel_id is not None:
+            self._channel_versions[int(channel_id)] = self._channel_versions.get(int(channel_id), 0) + 1
+        # Queries without a channel filter see every channel
+        self._global_version += 1
+
+    def bump_channels(self, channel_ids):
+        for channel_id in set(channel_ids):
+            self.bump_channel(channel_id)
+
+    def versions_for(self, filters: dict) -> tuple:
+        """Snapshot to store with a result; take it before running the query."""
+        channel_ids = []
+        for channel in filters.get("channels") or []:
+            try:
+                channel_ids.append(int(channel))
+            except ValueError:
+                pass
+        if not channel_ids:
+            return (("*", self._global_version),)
+        return tuple((channel_id, self._channel_versions.get(channel_id, 0)) for channel_id in sorted(set(channel_ids)))
+
+    def get(self, key: str, filters: dict) -> CachedResult | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if time.monotonic() - entry.created_at > self.ttl:
+            self.expired += 1
+        elif entry.versions != self.versions_for(filters):
+            self.stale += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self._remove(key)
+        self.misses += 1
+        return None
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry.size_bytes
+
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def put(self, key: str, versions: tuple, message_ids: list[int], export: bytes | None = None):
+        if export is not None and len(export) > self.max_export_bytes:
+            export = None
+        entry = CachedResult(versions, time.monotonic(), list(message_ids), export)
+        self._remove(key)
+        if entry.size_bytes > self.max_bytes // 8:
+            self.too_large += 1
+            return
+
+        self._entries[key] = entry
+        self.size_bytes += entry.size_bytes
+        while len(self._entries) > self.maxsize or self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "size_mb": round(self.size_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stale": self.stale,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "too_large": self.too_large,
+        }
+
+
+filter_cache = FilterCache()
@@ -0,0 +1,129 @@
+import asyncio
+import time
+import discord
+from bot.utils.db_handler import reconcile_channel
+from bot.utils.rate_limiter import route_limiter
+from bot.utils.reference_resolver import reference_resolver
+from bot.config.settings import RECONCILE_GUILD_CONCURRENCY, RECONCILE_STATUS_INTERVAL, RECONCILE_REACTION_MODE
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+class GuildReconcileProgress:
+    """Per-channel state and totals of one /reconcile-guild run."""
+
+    def __init__(self, channels: list[discord.TextChannel], concurrency: int):
+        self.concurrency = concurrency
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.names = {channel.id: channel.name for channel in channels}
+        self.messages = {channel.id: 0 for channel in channels}
+        self.running: set[int] = set()
+        self.done: set[int] = set()
+        self.failed: set[int] = set()
+
+    def start(self, channel_id: int):
+        self.running.add(channel_id)
+
+    def add_page(self, channel_id: int, count: int):
+        self.messages[channel_id] += count
+
+    def finish(self, channel_id: int, ok: bool):
+        self.running.discard(channel_id)
+        (self.done if ok else self.failed).add(channel_id)
+
+    @property
+    def total_messages(self) -> int:
+        return sum(self.messages.values())
+
+    def render(self) -> str:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        finished = len(self.done) + len(self.failed)
+        total = len(self.names)
+        throughput = self.total_messages / elapsed if elapsed > 0 else 0.0
+
+        if self.finished_at:
+            eta = "finished"
+        elif finished:
+            # Channels vary a lot in size, so this is only a rough guide
+            eta = f"~{format_duration(elapsed / finished * (total - finished))}"
+        else:
+            eta = "estimating..."
+
+        lines = [
+            f"**Reconciling {total} channels** · {self.concurrency} workers",
+            f"Done {len(self.done)}/{total} · Running {len(self.running)} · Failed {len(self.failed)}",
+            f"Messages {self.total_messages:,} · {throughput:.1f} msg/s · Elapsed {format_duration(elapsed)} · ETA {eta}",
+        ]
+        for channel_id in sorted(self.running, key=lambda cid: self.names[cid]):
+            lines.append(f"▶ #{self.names[channel_id]}: {self.messages[channel_id]:,} messages")
+        if self.failed:
+            lines.append("Failed: " + ", ".join(f"#{self.names[cid]}" for cid in sorted(self.failed, key=lambda cid: self.names[cid])))
+        return "\n".join(lines)[:2000]
+
+
+def reconcilable_channels(guild: discord.Guild) -> list[discord.TextChannel]:
+    me = guild.me
+    return [
+        channel for channel in guild.text_channels
+        if channel.permissions_for(me).read_messages and channel.permissions_for(me).read_message_history
+    ]
+
+
+async def reconcile_guild(guild: discord.Guild, backfill: bool, concurrency: int = RECONCILE_GUILD_CONCURRENCY,
+                          reaction_mode: str = RECONCILE_REACTION_MODE, on_status=None) -> GuildReconcileProgress:
+    """Reconcile every readable text channel of `guild` through a pool of `concurrency` workers.
+
+    `on_status(progress)` is awaited every RECONCILE_STATUS_INTERVAL seconds
+    and once at the end.
+    """
+    channels = reconcilable_channels(guild)
+    references_before = reference_resolver.stats()
+    progress = GuildReconcileProgress(channels, concurrency)
+
+    queue: asyncio.Queue[discord.TextChannel] = asyncio.Queue()
+    for channel in channels:
+        queue.put_nowait(channel)
+
+    async def worker():
+        while True:
+            try:
+                channel = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            progress.start(channel.id)
+            ok = await reconcile_channel(
+                channel,
+                backfill=backfill,
+                reaction_mode=reaction_mode,
+                on_page=lambda count, channel_id=channel.id: progress.add_page(channel_id, count)
+            )
+            progress.finish(channel.id, bool(ok))
+
+    async def report():
+        while True:
+            await asyncio.sleep(RECONCILE_STATUS_INTERVAL)
+            await on_status(progress)
+
+    reporter = asyncio.create_task(report()) if on_status else None
+    try:
+        await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, len(channels) or 1)))])
+    finally:
+        progress.finished_at = time.monotonic()
+        if reporter:
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+
+    if on_status:
+        await on_status(progress)
+    print(f"Guild {guild.id} reconciled: {progress.total_messages} messages, "
+          f"{len(progress.done)} channels done, {len(progress.failed)} failed; rate limiter: {route_limiter.stats()}; "
+          f"reply references: {reference_resolver.report(references_before)}")
+    return progress
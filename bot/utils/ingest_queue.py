@@ -0,0 +1,145 @@
+import asyncio
+import time
+from db.connection import AsyncSessionLocal
+from db.queries.messages import batch_create_messages
+from db.schema import Message
+from bot.utils.filter_cache import filter_cache
+from bot.config.settings import INGEST_BATCH_SIZE, INGEST_FLUSH_INTERVAL, INGEST_QUEUE_MAXSIZE, INGEST_STATS_INTERVAL
+
+
+class IngestQueue:
+    """Write-behind queue that persists live messages in batched transactions.
+
+    A batch is flushed once it holds `batch_size` messages or its oldest
+    message has waited `flush_interval` seconds. `put` blocks while the
+    queue is full, which pushes back on the gateway handlers. Stats are
+    logged at most every `stats_interval` seconds, after a flush.
+    """
+
+    def __init__(self, batch_size: int = INGEST_BATCH_SIZE, flush_interval: float = INGEST_FLUSH_INTERVAL, maxsize: int = INGEST_QUEUE_MAXSIZE, stats_interval: float = INGEST_STATS_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats_interval = stats_interval
+        self._queue: asyncio.Queue[Message] = asyncio.Queue(maxsize=maxsize)
+        self._batch: list[Message] = []
+        self._pending_ids: set[int] = set()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+        self.flushed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + len(self._batch)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "flushed": self.flushed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 2) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        print(f"Ingest queue stopped: {self.stats()}")
+
+    async def put(self, message: Message):
+        self._pending_ids.add(message.id)
+        await self._queue.put(message)
+
+    async def ensure_flushed(self, message_id: int):
+        # Edits, deletes and reactions must not run ahead of the insert
+        if message_id in self._pending_ids:
+            await self.flush()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+        while True:
+            self._batch.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+
+            while len(self._batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.flush()
+
+            if self.stats_interval > 0 and loop.time() - last_report >= self.stats_interval:
+                last_report = loop.time()
+                print(f"Ingest queue: {self.stats()}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            while not self._queue.empty():
+                self._batch.append(self._queue.get_nowait())
+
+            while self._batch:
+                batch = self._batch[:self.batch_size]
+                del self._batch[:self.batch_size]
+                try:
+                    await self._write_batch(batch)
+                except asyncio.CancelledError:
+                    # Cancelled mid-write (e.g. by stop()): keep the batch for the final flush;
+                    # rows that did commit are skipped by the idempotent insert
+                    self._batch[:0] = batch
+                    raise
+
+    async def _insert(self, batch: list[Message]):
+        try:
+            async with AsyncSessionLocal() as db:
+                inserted, skipped = await batch_create_messages(db, batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed += 1
+                print(f"Error flushing queued message {batch[0].id}: {e}")
+                return
+            # Split the batch so one bad row does not take the valid ones down with it
+            middle = len(batch) // 2
+            await self._insert(batch[:middle])
+            await self._insert(batch[middle:])
+            return
+        self.flushed += inserted
+        self.skipped += skipped
+
+    async def _write_batch(self, batch: list[Message]):
+        start = time.perf_counter()
+        await self._insert(batch)
+        filter_cache.bump_channels(msg.channel_id for msg in batch)
+        self._pending_ids.difference_update(msg.id for msg in batch)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.batches += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+
+ingest_queue = IngestQueue()
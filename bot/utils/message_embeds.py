@@ -0,0 +1,17 @@
+import discord
+
+
+def message_link(guild: discord.Guild | None, message) -> str:
+    return f"https://discord.com/channels/{guild.id if guild else '@me'}/{message.channel_id}/{message.id}"
+
+
+def add_message_field(embed: discord.Embed, guild: discord.Guild | None, message):
+    # One archived message as a compact embed field: date, content preview, channel, author and jump link
+    content = (message.content or "(No content)").replace("\n", " ")
+    if len(content) > 200:
+        content = content[:197] + "..."
+    embed.add_field(
+        name=message.timestamp.strftime('%Y-%m-%d %H:%M') if message.timestamp else "Unknown date",
+        value=f"{content}\n<#{message.channel_id}> · <@{message.author_id}> · [Jump]({message_link(guild, message)})"[:1024],
+        inline=False
+    )
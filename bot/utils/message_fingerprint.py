@@ -0,0 +1,40 @@
+import hashlib
+import json
+import discord
+
+def _digest(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+def message_flags(message: discord.Message) -> int | None:
+    flags = getattr(message, "flags", None)
+    return flags.value if flags is not None else None
+
+
+def message_fingerprint(message: discord.Message) -> dict[str, str]:
+    """Short hash of each part of a message as Discord reports it.
+
+    Attachments are identified by id, name and size rather than URL, because
+    Discord signs CDN URLs with an expiry and they change between fetches.
+    Reactions are compared by count, so the hash needs no extra requests.
+    """
+    return {
+        "content": _digest([message.content, getattr(message, "edited_at", None)]),
+        "attachments": _digest([
+            [att.id, att.filename, getattr(att, "size", None), getattr(att, "content_type", None)]
+            for att in message.attachments
+        ]),
+        "embeds": _digest([embed.to_dict() for embed in message.embeds]),
+        "reactions": _digest([
+            [str(reaction.emoji), reaction.count] for reaction in message.reactions
+        ]),
+        "flags": _digest([bool(getattr(message, "pinned", False)), message_flags(message)]),
+    }
+
+
+def changed_parts(stored: dict | None, current: dict[str, str]) -> list[str]:
+    # Rows stored before fingerprints existed count as changed in every part
+    if not stored:
+        return list(current)
+    return [part for part, digest in current.items() if stored.get(part) != digest]
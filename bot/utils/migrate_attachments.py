@@ -0,0 +1,102 @@
+"""
+Move legacy attachments from bot/attachments/msg_<message_id>/<filename>
+into the content-addressed store and repoint messages.attachments at the
+new paths. Files are copied into the store and the originals are deleted
+only after the database commit, so a failed folder can simply be re-run.
+Files no stored attachment refers to are left in place and reported.
+Safe to re-run; already migrated folders are gone.
+
+Usage: python -m bot.utils.migrate_attachments [--dry-run]
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from db.db_utils import SessionLocal
+from db.schema import Message, Attachment, AttachmentBlob
+from bot.utils.file_manager import ATTACHMENTS_DIR, hash_file, copy_blob, safe_attachment_filename
+
+
+def migrate_message_folder(db, msg_dir: Path, dry_run: bool) -> int:
+    try:
+        message_id = int(msg_dir.name[len("msg_"):])
+    except ValueError:
+        print(f"Skipping {msg_dir}: not a message folder")
+        return 0
+
+    message = db.get(Message, message_id)
+    attachments = [dict(att) for att in (message.attachments or [])] if message else []
+    by_filename = {safe_attachment_filename(att.get("filename") or ""): att for att in attachments}
+
+    copied = []
+    for file_path in sorted(msg_dir.iterdir()):
+        if not file_path.is_file() or file_path.suffix == ".part":
+            continue
+
+        # Without a stored attachment to point at the blob, the file stays where it is
+        att = by_filename.get(file_path.name)
+        if not att:
+            reason = "no attachment metadata" if message else "message not in the database"
+            print(f"Leaving {file_path} in place: {reason} (message {message_id})")
+            continue
+
+        sha256, size = hash_file(file_path)
+        if dry_run:
+            print(f"[dry-run] {file_path} -> {sha256}")
+            copied.append(file_path)
+            continue
+
+        local_path = copy_blob(file_path, sha256)
+        copied.append(file_path)
+        att["local_path"] = str(local_path)
+        att["is_downloaded"] = True
+        att["sha256"] = sha256
+        if att.get("id"):
+            db.execute(
+                update(Attachment)
+                .where(Attachment.id == int(att["id"]))
+                .values(local_path=str(local_path), sha256=sha256)
+            )
+            stmt = insert(AttachmentBlob.__table__).values(
+                attachment_id=int(att["id"]),
+                url=att.get("url"),
+                sha256=sha256,
+                size=size,
+            ).on_conflict_do_nothing(index_elements=[AttachmentBlob.__table__.c.attachment_id])
+            db.execute(stmt)
+
+    if not dry_run:
+        if message:
+            message.attachments = attachments
+        db.commit()
+
+        # The new paths are committed, so the originals are no longer referenced
+        for file_path in copied:
+            file_path.unlink(missing_ok=True)
+        if not any(msg_dir.iterdir()):
+            msg_dir.rmdir()
+
+    return len(copied)
+
+
+def migrate_legacy_attachments(dry_run: bool = False):
+    folders = sorted(p for p in ATTACHMENTS_DIR.glob("msg_*") if p.is_dir())
+    print(f"Found {len(folders)} legacy attachment folders")
+
+    total = 0
+    with SessionLocal() as db:
+        for msg_dir in folders:
+            try:
+                total += migrate_message_folder(db, msg_dir, dry_run)
+            except Exception as e:
+                db.rollback()
+                print(f"Error migrating {msg_dir}: {e}")
+
+    print(f"Migrated {total} files into {ATTACHMENTS_DIR / 'blobs'}")
+
+
+if __name__ == "__main__":
+    migrate_legacy_attachments(dry_run="--dry-run" in sys.argv)
@@ -0,0 +1,33 @@
+import asyncio
+
+
+async def prefetch(items, depth: int):
+    """Run the async iterator `items` in its own task, up to `depth` items ahead of the consumer.
+
+    Errors raised by the producer surface in the consumer; leaving the loop
+    early cancels the producer.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    done = object()
+
+    async def produce():
+        try:
+            async for item in items:
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((done, e))
+            return
+        await queue.put((done, None))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
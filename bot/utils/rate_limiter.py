@@ -0,0 +1,92 @@
+"""
+Client-side token buckets for Discord REST calls.
+
+Rates are fixed from settings; nothing here reads Discord's X-RateLimit-*
+headers. The server-side limits (bucket headers, 429 retry-after, global
+limit) are left to discord.py's HTTP client, which already honours them;
+these buckets only keep many workers from tripping them in the first place.
+"""
+import asyncio
+import time
+from bot.config.settings import DISCORD_GLOBAL_RATE, DISCORD_ROUTE_RATE, DISCORD_ROUTE_BURST
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def is_full(self, now: float) -> bool:
+        # A bucket that has refilled completely and is not in use behaves exactly like a new one
+        return not self._lock.locked() and self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the time waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class RouteRateLimiter:
+    """Client-side pacing of Discord REST calls.
+
+    Discord limits each route (per channel for message endpoints) and the
+    bot as a whole. discord.py retries after a 429, but many workers hitting
+    the same buckets would keep tripping them; taking a token from the
+    route's bucket and the global one before each call keeps requests under
+    the limits instead. Route buckets that have refilled are dropped every
+    `sweep_interval` seconds, so channels seen once do not stay in memory.
+    """
+
+    def __init__(self, global_rate: float = DISCORD_GLOBAL_RATE, route_rate: float = DISCORD_ROUTE_RATE,
+                 route_burst: float = DISCORD_ROUTE_BURST, sweep_interval: float = 60.0):
+        self.route_rate = route_rate
+        self.route_burst = route_burst
+        self.sweep_interval = sweep_interval
+        self._global = TokenBucket(global_rate, global_rate)
+        self._routes: dict[str, TokenBucket] = {}
+        self._last_sweep = time.monotonic()
+        self.requests = 0
+        self.waited = 0.0
+        self.evicted = 0
+
+    def _sweep(self, now: float):
+        idle = [route for route, bucket in self._routes.items() if bucket.is_full(now)]
+        for route in idle:
+            del self._routes[route]
+        self.evicted += len(idle)
+        self._last_sweep = now
+
+    async def acquire(self, route: str):
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+
+        bucket = self._routes.get(route)
+        if bucket is None:
+            bucket = self._routes[route] = TokenBucket(self.route_rate, self.route_burst)
+
+        waited = await bucket.acquire()
+        waited += await self._global.acquire()
+        self.requests += 1
+        self.waited += waited
+
+    def stats(self) -> dict:
+        return {"routes": len(self._routes), "evicted": self.evicted, "requests": self.requests, "waited_s": round(self.waited, 2)}
+
+
+route_limiter = RouteRateLimiter()
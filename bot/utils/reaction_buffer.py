@@ -0,0 +1,79 @@
+import asyncio
+from db.connection import AsyncSessionLocal
+from db.queries.reactions import apply_reaction_changes, ReactionChanges
+from bot.utils.ingest_queue import ingest_queue
+from bot.utils.filter_cache import filter_cache
+from bot.config.settings import REACTION_COALESCE_WINDOW
+
+
+class ReactionBuffer:
+    """Folds bursts of reaction events on the same message into one write.
+
+    The first event for a message opens a window of `window` seconds; every
+    add/remove arriving in that window is merged (last event per user and
+    emoji wins, with the net number of events kept for count-only entries)
+    and written in one row-locked transaction when it closes.
+    """
+
+    def __init__(self, window: float = REACTION_COALESCE_WINDOW):
+        self.window = window
+        self._pending: dict[int, ReactionChanges] = {}
+        self._channels: dict[int, int] = {}
+        self._timers: dict[int, asyncio.Task] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.events = 0
+        self.writes = 0
+
+    def add(self, message_id: int, channel_id: int, emoji_id: str | None, emoji_name: str, user_id: int, added: bool):
+        self.events += 1
+        self._channels[message_id] = channel_id
+        # Keep the last event per user and emoji, plus the net count for count-only entries
+        changes = self._pending.setdefault(message_id, {})
+        key = (emoji_id, emoji_name, user_id)
+        changes[key] = (added, changes.get(key, (added, 0))[1] + (1 if added else -1))
+
+        if message_id not in self._timers:
+            task = asyncio.create_task(self._flush_later(message_id))
+            self._timers[message_id] = task
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(self, message_id: int):
+        await asyncio.sleep(self.window)
+        await self.flush_message(message_id)
+
+    async def flush_message(self, message_id: int):
+        self._timers.pop(message_id, None)
+        changes = self._pending.pop(message_id, None)
+        channel_id = self._channels.pop(message_id, None)
+        if not changes:
+            return
+
+        # Reactions can arrive before the message itself has been flushed
+        await ingest_queue.ensure_flushed(message_id)
+
+        async with AsyncSessionLocal() as db:
+            try:
+                if await apply_reaction_changes(db, message_id, changes):
+                    self.writes += 1
+                    filter_cache.bump_channel(channel_id)
+                    print(f"Applied {len(changes)} reaction changes to message {message_id}")
+                else:
+                    print(f"No message found in DB with ID {message_id}")
+            except Exception as e:
+                print(f"Error applying reactions to message {message_id}: {e}")
+
+    async def stop(self):
+        # Write everything still pending now instead of cancelling timers that may be mid-write;
+        # timers that wake up afterwards find nothing left to flush
+        for message_id in list(self._pending):
+            await self.flush_message(message_id)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"pending_messages": len(self._pending), "events": self.events, "writes": self.writes}
+
+
+reaction_buffer = ReactionBuffer()
@@ -0,0 +1,67 @@
+import asyncio
+from bot.utils.rate_limiter import TokenBucket
+from bot.config.settings import REACTION_HYDRATE_RATE, REACTION_HYDRATE_QUEUE_MAXSIZE
+
+
+class ReactionHydrator:
+    """Low-priority background queue that fills in reaction user lists.
+
+    Reconcile in "full" reaction mode stores emoji counts only and queues
+    the message here. A single worker hydrates one message at a time,
+    taking a token from its own bucket (`rate` requests per second) before
+    every request, so it only uses a small, fixed share of the Discord
+    budget and never competes with reconcile for it. When the queue is
+    full further messages are dropped and keep their counts.
+    """
+
+    def __init__(self, rate: float = REACTION_HYDRATE_RATE, maxsize: int = REACTION_HYDRATE_QUEUE_MAXSIZE):
+        self._bucket = TokenBucket(rate, 1)
+        self._queue: asyncio.Queue[tuple] = asyncio.Queue(maxsize=maxsize)
+        self._task: asyncio.Task | None = None
+        self._hydrate = None
+        self.hydrated = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self, hydrate):
+        # `hydrate(channel, message_id, pace)` fetches and stores the user lists, awaiting `pace()` before each request
+        self._hydrate = hydrate
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        print(f"Reaction hydrator stopped: {self.stats()}")
+
+    def enqueue(self, channel, message_id: int) -> bool:
+        try:
+            self._queue.put_nowait((channel, message_id))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def pace(self):
+        await self._bucket.acquire()
+
+    async def _run(self):
+        while True:
+            channel, message_id = await self._queue.get()
+            try:
+                if await self._hydrate(channel, message_id, self.pace):
+                    self.hydrated += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Error hydrating reactions of message {message_id}: {e}")
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "hydrated": self.hydrated, "dropped": self.dropped, "failed": self.failed}
+
+
+reaction_hydrator = ReactionHydrator()
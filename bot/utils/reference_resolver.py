@@ -0,0 +1,160 @@
+import asyncio
+from collections import OrderedDict
+import discord
+from db.connection import AsyncSessionLocal
+from db.queries.messages import get_reference_source
+from bot.utils.rate_limiter import route_limiter
+from bot.utils.serialize_datetime import serialize_datetime
+from bot.config.settings import REFERENCE_CACHE_SIZE
+
+
+def author_payload(user) -> dict:
+    return {
+        "id": int(user.id),
+        "username": getattr(user, "name", None),
+        "discriminator": getattr(user, "discriminator", None),
+        "global_name": getattr(user, "global_name", None),
+        "avatar": str(user.avatar.url) if getattr(user, "avatar", None) else None,
+        "bot": bool(getattr(user, "bot", False)),
+        "system": bool(getattr(user, "system", False)),
+    }
+
+
+def reference_payload(ref_msg: discord.Message) -> dict:
+    return {
+        "id": int(ref_msg.id),
+        "channel_id": int(ref_msg.channel.id) if getattr(ref_msg, "channel", None) else None,
+        "author": author_payload(ref_msg.author),
+        "content": ref_msg.content,
+        "attachments": [att.to_dict() for att in getattr(ref_msg, "attachments", [])],
+        "embeds": [emb.to_dict() for emb in getattr(ref_msg, "embeds", [])],
+        "timestamp": serialize_datetime(getattr(ref_msg, "created_at", None)),
+        "edited_timestamp": serialize_datetime(getattr(ref_msg, "edited_at", None)),
+        "type": getattr(ref_msg, "type", None).name if getattr(ref_msg, "type", None) else None
+    }
+
+
+def stored_reference_payload(row) -> dict:
+    # Same shape as reference_payload, built from an archived row instead of the API
+    user = row.User
+    return {
+        "id": int(row.id),
+        "channel_id": int(row.channel_id),
+        "author": {
+            "id": int(user.id),
+            "username": user.username,
+            "discriminator": user.discriminator,
+            "global_name": user.global_name,
+            "avatar": user.avatar,
+            "bot": bool(user.bot),
+            "system": bool(user.system),
+        },
+        "content": row.content,
+        "attachments": [
+            {key: att.get(key) for key in ("id", "filename", "url", "content_type", "size")}
+            for att in row.attachments or []
+        ],
+        "embeds": row.embeds or [],
+        "timestamp": serialize_datetime(row.timestamp),
+        "edited_timestamp": serialize_datetime(row.edited_timestamp),
+        "type": row.type.name if row.type else None
+    }
+
+
+class ReferenceResolver:
+    """Resolves the target of a reply without asking Discord where possible.
+
+    Lookups try, in order: the archived messages table, an LRU of payloads
+    built recently (`maxsize` entries, including targets Discord reported
+    as deleted), a fetch of the same id already in flight, and finally
+    Discord itself. Concurrent lookups of one popular parent share a
+    single request.
+    """
+
+    def __init__(self, maxsize: int = REFERENCE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._payloads: OrderedDict[int, dict | None] = OrderedDict()
+        self._inflight: dict[int, asyncio.Future] = {}
+        self.lookups = 0
+        self.db_hits = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.fetched = 0
+
+    def remember(self, message_id: int, payload: dict | None):
+        self._payloads[message_id] = payload
+        self._payloads.move_to_end(message_id)
+        while len(self._payloads) > self.maxsize:
+            self._payloads.popitem(last=False)
+
+    def remember_message(self, message: discord.Message):
+        self.remember(int(message.id), reference_payload(message))
+
+    async def resolve(self, guild: discord.Guild, channel_id: int, message_id: int) -> dict | None:
+        self.lookups += 1
+
+        async with AsyncSessionLocal() as db:
+            row = await get_reference_source(db, message_id)
+        if row:
+            self.db_hits += 1
+            return stored_reference_payload(row)
+
+        if message_id in self._payloads:
+            self.cache_hits += 1
+            self._payloads.move_to_end(message_id)
+            return self._payloads[message_id]
+
+        pending = self._inflight.get(message_id)
+        if pending:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[message_id] = future
+        try:
+            payload = await self._fetch(guild, channel_id, message_id)
+            future.set_result(payload)
+            return payload
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters see the error; nobody else may be awaiting it
+            future.exception()
+            raise
+        finally:
+            del self._inflight[message_id]
+
+    async def _fetch(self, guild: discord.Guild, channel_id: int, message_id: int) -> dict | None:
+        self.fetched += 1
+        try:
+            ref_channel = guild.get_channel(channel_id) or await guild.fetch_channel(channel_id)
+            await route_limiter.acquire(f"messages:{ref_channel.id}")
+            ref_msg = await ref_channel.fetch_message(message_id)
+        except discord.NotFound:
+            # Deleted targets stay deleted; remember that too
+            self.remember(message_id, None)
+            return None
+        payload = reference_payload(ref_msg)
+        self.remember(message_id, payload)
+        return payload
+
+    def stats(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "db_hits": self.db_hits,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "fetched": self.fetched,
+            "size": len(self._payloads),
+        }
+
+    def report(self, since: dict | None = None) -> str:
+        """Hit rate and REST calls saved, overall or since an earlier stats() snapshot."""
+        current = self.stats()
+        delta = {key: current[key] - (since or {}).get(key, 0) for key in ("lookups", "db_hits", "cache_hits", "coalesced", "fetched")}
+        saved = delta["db_hits"] + delta["cache_hits"] + delta["coalesced"]
+        rate = saved / delta["lookups"] if delta["lookups"] else 0.0
+        return (f"{delta['lookups']} lookups, {delta['db_hits']} from DB, {delta['cache_hits']} from cache, "
+                f"{delta['coalesced']} coalesced, {delta['fetched']} fetched; hit rate {rate:.0%}, {saved} REST calls saved")
+
+
+reference_resolver = ReferenceResolver()
@@ -0,0 +1,39 @@
+from collections import OrderedDict
+from db.schema import User
+from bot.config.settings import USER_CACHE_SIZE
+
+
+def user_fingerprint(user: User) -> tuple:
+    return (user.username, user.global_name, user.avatar, bool(user.bot), bool(user.system))
+
+
+class UserCache:
+    """LRU of saved users keyed by id, remembering the profile last written."""
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._users: OrderedDict[int, tuple[tuple, User]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user: User) -> User | None:
+        """Return the cached row if `user` matches the profile already stored."""
+        entry = self._users.get(user.id)
+        if entry and entry[0] == user_fingerprint(user):
+            self._users.move_to_end(user.id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, user: User):
+        self._users[user.id] = (user_fingerprint(user), user)
+        self._users.move_to_end(user.id)
+        while len(self._users) > self.maxsize:
+            self._users.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._users), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache()
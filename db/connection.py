@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import InvalidRequestError
-from bot.config.settings import DATABASE_URL
+from bot.config.settings import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW
 
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set in environment")
@@ -14,7 +14,7 @@ elif db_url.startswith("postgresql+psycopg2://"):
     db_url = db_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
 
 try:
-    engine = create_async_engine(db_url, echo=False)
+    engine = create_async_engine(db_url, echo=False, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
 except ModuleNotFoundError as e:
     if 'asyncpg' in str(e):
         raise RuntimeError("The async DB driver 'asyncpg' is required for SQLAlchemy asyncio. Install it in your venv: pip install asyncpg") from e
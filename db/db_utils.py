@@ -13,14 +13,3 @@ if sync_db_url.startswith("postgresql+psycopg2://"):
 engine = create_engine(sync_db_url, echo=False)
 SessionLocal = sessionmaker(bind=engine)
 
-
-def get_message_attachments(db_session, message_id):
-    try:
-        from db.schema import Message
-    except Exception:
-        return []
-
-    message = db_session.query(Message).filter(Message.id == message_id).first()
-    if not message:
-        return []
-    return message.attachments or []
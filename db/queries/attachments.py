@@ -1,11 +1,124 @@
+from db.schema import Message, Attachment, AttachmentBlob
+from sqlalchemy import update, delete, exists, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
 # G. Attachments
 
-# Endpoints for attachments storage.
+# Attachment metadata lives in the messages.attachments JSON list and is
+# mirrored into the attachments table for indexed filtering. File contents
+# live in the content-addressed store indexed by attachment_blobs.
+
+def attachment_rows(message_id: int, attachments: list[dict] | None) -> list[dict]:
+    return [
+        {
+            "id": int(att["id"]),
+            "message_id": message_id,
+            "filename": att.get("filename"),
+            "size": att.get("size"),
+            "content_type": att.get("content_type"),
+            "url": att.get("url"),
+            "local_path": att.get("local_path"),
+            "sha256": att.get("sha256"),
+        }
+        for att in attachments or []
+        if att.get("id")
+    ]
+
+
+# Insert normalized attachment rows. Does not commit.
+async def insert_attachment_rows(db: AsyncSession, rows: list[dict]) -> None:
+    if not rows:
+        return
+    stmt = insert(Attachment.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attachment.__table__.c.id],
+        set_={column: stmt.excluded[column] for column in ("message_id", "filename", "size", "content_type", "url", "local_path", "sha256")},
+    )
+    await db.execute(stmt, rows)
+
+
+# Rebuild the normalized rows of some messages from their JSON lists. Does not commit.
+async def replace_message_attachments(db: AsyncSession, attachments_by_message: dict[int, list[dict]]) -> None:
+    if not attachments_by_message:
+        return
+    await db.execute(
+        delete(Attachment)
+        .where(Attachment.message_id.in_(list(attachments_by_message)))
+        .execution_options(synchronize_session=False)
+    )
+    rows = []
+    for message_id, attachments in attachments_by_message.items():
+        rows.extend(attachment_rows(message_id, attachments))
+    await insert_attachment_rows(db, rows)
+
+
+# SQL predicate: the message has at least one attachment
+def has_attachment():
+    return exists().where(Attachment.message_id == Message.id)
+
+
+# SQL predicate: one of the message's attachment filenames contains `term` (trigram indexed)
+def attachment_name_contains(term: str):
+    return exists().where(
+        Attachment.message_id == Message.id,
+        Attachment.filename.ilike(f"%{term}%"),
+    )
+
+# Record where a background download landed on disk
+async def mark_attachment_downloaded(db: AsyncSession, message_id: int, attachment_id: int, local_path: str, sha256: str | None = None) -> bool:
+    # Lock the row so concurrent downloads for the same message don't overwrite each other
+    result = await db.execute(
+        select(Message.attachments).filter(Message.id == message_id).with_for_update()
+    )
+    row = result.first()
+    if row is None:
+        await db.rollback()
+        return False
+
+    attachments = [dict(att) for att in (row.attachments or [])]
+    found = False
+    for att in attachments:
+        if str(att.get("id")) == str(attachment_id):
+            att["local_path"] = local_path
+            att["is_downloaded"] = True
+            if sha256:
+                att["sha256"] = sha256
+            found = True
 
-# POST /messages/{message_id}/attachments – Add attachment metadata + save file.
+    if not found:
+        await db.rollback()
+        return False
 
-# GET /messages/{message_id}/attachments – Fetch attachments metadata.
+    await db.execute(update(Message).where(Message.id == message_id).values(attachments=attachments))
+    await db.execute(
+        update(Attachment)
+        .where(Attachment.id == int(attachment_id))
+        .values(local_path=local_path, sha256=sha256)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return True
 
-# PUT /messages/{message_id}/attachments/{attachment_id} – Update metadata (rare).
+# Look up an already stored file by Discord attachment id or URL
+async def get_attachment_blob(db: AsyncSession, attachment_id: int, url: str | None = None) -> AttachmentBlob | None:
+    condition = AttachmentBlob.attachment_id == attachment_id
+    if url:
+        condition = or_(condition, AttachmentBlob.url == url)
+    result = await db.execute(select(AttachmentBlob).filter(condition).limit(1))
+    return result.scalar_one_or_none()
 
-# DELETE /messages/{message_id}/attachments/{attachment_id} – Keep for history; optional soft-delete.
+async def record_attachment_blob(db: AsyncSession, attachment_id: int, url: str | None, sha256: str, size: int | None) -> None:
+    stmt = insert(AttachmentBlob.__table__).values(
+        attachment_id=attachment_id,
+        url=url,
+        sha256=sha256,
+        size=size,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AttachmentBlob.__table__.c.attachment_id],
+        set_={"url": stmt.excluded.url, "sha256": stmt.excluded.sha256, "size": stmt.excluded.size},
+    )
+    await db.execute(stmt)
+    await db.commit()
@@ -0,0 +1,46 @@
+from db.schema import Message
+from sqlalchemy import delete, func, any_, bindparam, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+# I. Deletion scan
+
+# A channel's archived ids are grouped into fixed-width id ranges (time
+# buckets, since snowflakes start with a timestamp). Each bucket is
+# summarised by (count, sum of ids), which is compared with the same digest
+# of the ids Discord returns for that range.
+
+
+# (count, sum of ids) per non-empty bucket of `width` ids in [min_id, max_id); served by ix_messages_channel_id_id
+async def get_id_bucket_digests(db: AsyncSession, channel_id: int, width: int, min_id: int, max_id: int) -> dict[int, tuple[int, int]]:
+    bucket = (Message.id // width).label("bucket")
+    result = await db.execute(
+        select(bucket, func.count(), func.sum(Message.id))
+        .filter(Message.channel_id == channel_id, Message.id >= min_id, Message.id < max_id)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return {int(bucket_id): (count, int(total)) for bucket_id, count, total in result.all()}
+
+
+async def get_channel_ids_in_range(db: AsyncSession, channel_id: int, min_id: int, max_id: int) -> list[int]:
+    result = await db.execute(
+        select(Message.id)
+        .filter(Message.channel_id == channel_id, Message.id >= min_id, Message.id < max_id)
+        .order_by(Message.id)
+    )
+    return list(result.scalars().all())
+
+
+# Delete messages by id in one statement (the ids travel as a single array parameter); reactions and attachments cascade
+async def delete_messages_by_ids(db: AsyncSession, channel_id: int, message_ids: list[int]) -> int:
+    if not message_ids:
+        return 0
+    result = await db.execute(
+        delete(Message)
+        .where(Message.channel_id == channel_id, Message.id == any_(bindparam("ids", message_ids, type_=ARRAY(BigInteger))))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
@@ -1,4 +1,8 @@
-from db.schema import Message
+from db.schema import Message, User
+from db.queries.reactions import insert_reaction_rows, reaction_rows, replace_message_reactions
+from db.queries.attachments import insert_attachment_rows, attachment_rows, replace_message_attachments
+from sqlalchemy import update, bindparam, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from datetime import datetime
@@ -30,6 +34,11 @@ async def update_message(db: AsyncSession, message_id: int, author_id: int, upda
     if "content" in updates:
         message.edited_timestamp = datetime.now()
 
+    if "reactions" in updates:
+        await replace_message_reactions(db, {message.id: updates["reactions"]})
+    if "attachments" in updates:
+        await replace_message_attachments(db, {message.id: updates["attachments"]})
+
     await db.commit()
     await db.refresh(message)
     return message
@@ -47,30 +56,123 @@ async def delete_message(db: AsyncSession, message_id: int, author_id: int) -> b
     await db.commit()
     return True
 
-async def batch_create_messages(db: AsyncSession, messages: list[Message]) -> list[Message]:
-    db.add_all(messages)
-    await db.commit()
-    return messages
-
-async def batch_update_messages(db: AsyncSession, message_updates: list[tuple[Message, Dict[str, Any]]]) -> list[Message]:
-    updated_messages = []
-    for message, updates in message_updates:
-        for key, value in updates.items():
-            if hasattr(message, key):
-                setattr(message, key, value)
-        
-        if "content" in updates:
-            message.edited_timestamp = datetime.now()
-        
-        updated_messages.append(message)
-    
-    await db.commit()
-    return updated_messages
+def message_to_row(message: Message) -> Dict[str, Any]:
+    # Plain column dict for Core inserts; fills in the column defaults the ORM would apply
+    row = {}
+    for column in Message.__table__.columns:
+        # Columns the database fills itself (content_tsv) are left to it
+        if column.server_default is not None:
+            continue
+        value = getattr(message, column.key)
+        if value is None and column.default is not None:
+            value = column.default.arg if column.default.is_scalar else column.default.arg(None)
+        row[column.key] = value
+    return row
+
+async def batch_create_messages(db: AsyncSession, messages: list[Message], on_conflict: str = "nothing", commit: bool = True) -> tuple[int, int]:
+    """Insert messages with one executemany INSERT ... ON CONFLICT (id).
+
+    `on_conflict` is "nothing" to keep rows that already exist or "update"
+    to overwrite them. With `commit=False` the caller owns the transaction.
+    Returns (inserted, existing): rows that were new, and rows that were
+    already stored (skipped, or overwritten with "update"). Repeated ids in
+    the batch count once.
+    """
+    if not messages:
+        return 0, 0
+
+    # Later duplicates of the same id in one batch win, like repeated ORM adds
+    rows = list({row["id"]: row for row in map(message_to_row, messages)}.values())
+
+    stmt = insert(Message.__table__)
+    if on_conflict == "update":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Message.__table__.c.id],
+            set_={column.key: stmt.excluded[column.key] for column in Message.__table__.columns if not column.primary_key and column.server_default is None},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Message.__table__.c.id])
+
+    # xmax is 0 only on a freshly inserted row version, so updated rows are told apart from inserts
+    result = await db.execute(stmt.returning(Message.__table__.c.id, (literal_column("xmax") == 0).label("inserted")), rows)
+    written = result.all()
+    written_ids = {row.id for row in written}
+    inserted = sum(1 for row in written if row.inserted)
+
+    # Mirror reactions and attachments of the rows actually written into their tables
+    written_reactions = {row["id"]: row["reactions"] for row in rows if row["id"] in written_ids}
+    written_attachments = {row["id"]: row["attachments"] for row in rows if row["id"] in written_ids}
+    if on_conflict == "update":
+        await replace_message_reactions(db, written_reactions)
+        await replace_message_attachments(db, written_attachments)
+    else:
+        await insert_reaction_rows(db, [
+            reaction_row
+            for message_id, reactions in written_reactions.items()
+            for reaction_row in reaction_rows(message_id, reactions)
+        ])
+        await insert_attachment_rows(db, [
+            attachment_row
+            for message_id, attachments in written_attachments.items()
+            for attachment_row in attachment_rows(message_id, attachments)
+        ])
+
+    if commit:
+        await db.commit()
+    return inserted, len(rows) - inserted
 
-async def get_messages_batch(db: AsyncSession, message_ids: list[int]) -> Dict[int, Message]:
+async def batch_update_message_columns(db: AsyncSession, updates: Dict[int, Dict[str, Any]]) -> int:
+    """Write only the given columns of each message.
+
+    Messages with the same set of changed columns share one executemany
+    UPDATE. Reactions and attachments that change are mirrored into their
+    tables. Does not commit. Returns the number of messages updated.
+    """
+    table = Message.__table__
+    groups: Dict[tuple, list[Dict[str, Any]]] = {}
+    for message_id, values in updates.items():
+        params = {"b_id": message_id, **{f"b_{key}": value for key, value in values.items()}}
+        groups.setdefault(tuple(sorted(values)), []).append(params)
+
+    for columns, params in groups.items():
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values({column: bindparam(f"b_{column}", type_=table.c[column].type) for column in columns})
+        )
+        await db.execute(stmt, params)
+
+    await replace_message_reactions(db, {
+        message_id: values["reactions"] for message_id, values in updates.items() if "reactions" in values
+    })
+    await replace_message_attachments(db, {
+        message_id: values["attachments"] for message_id, values in updates.items() if "attachments" in values
+    })
+    return len(updates)
+
+# Stored fingerprints of the given ids that exist (None for rows that have none yet)
+async def get_message_fingerprints(db: AsyncSession, message_ids: list[int]) -> Dict[int, dict | None]:
     result = await db.execute(
-        select(Message).filter(Message.id.in_(message_ids))
+        select(Message.id, Message.fingerprint).filter(Message.id.in_(message_ids))
     )
-    messages = result.scalars().all()
-    return {msg.id: msg for msg in messages}
+    return {message_id: fingerprint for message_id, fingerprint in result.all()}
 
+async def get_message_attachments(db: AsyncSession, message_ids: list[int]) -> Dict[int, list]:
+    if not message_ids:
+        return {}
+    result = await db.execute(
+        select(Message.id, Message.attachments).filter(Message.id.in_(message_ids))
+    )
+    return {message_id: attachments for message_id, attachments in result.all()}
+
+# A stored message and its author, as needed to describe it as the target of a reply
+async def get_reference_source(db: AsyncSession, message_id: int):
+    result = await db.execute(
+        select(
+            Message.id, Message.channel_id, Message.content, Message.attachments, Message.embeds,
+            Message.timestamp, Message.edited_timestamp, Message.type, User,
+        )
+        .join(User, User.id == Message.author_id)
+        .filter(Message.id == message_id)
+    )
+    return result.first()
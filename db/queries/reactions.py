@@ -1,11 +1,211 @@
-from sqlalchemy.orm import Session
+from db.schema import Message, MessageReaction
+from sqlalchemy import update, delete, exists, func, and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 
 # E. Reactions
 
-# Endpoints to track message reactions.
+# Reactions are stored on messages.reactions as a list of entries shaped like
+# Discord's reaction objects, plus the ids of the users who reacted. Every
+# (message, emoji, user) pair is mirrored into message_reactions for
+# indexed filtering. Entries stored from counts alone (no user lists yet)
+# carry "hydrated": false and are mirrored as one row for UNKNOWN_REACTOR_ID,
+# so the reaction filter still finds them.
 
-# POST /messages/{message_id}/reactions – Add a reaction.
+UNKNOWN_REACTOR_ID = 0
 
-# DELETE /messages/{message_id}/reactions – Remove a reaction.
+# (emoji_id, emoji_name, user_id) -> (True if the last event was an add, net adds minus removes)
+ReactionChanges = dict[tuple[str | None, str, int], tuple[bool, int]]
 
-# GET /messages/{message_id}/reactions – List reactions with counts.
\ No newline at end of file
+
+def reaction_entry(emoji_id: str | None, emoji_name: str, users: list[int]) -> dict:
+    return {
+        'count': len(users),
+        'count_details': {'burst': 0, 'normal': len(users)},
+        'me': False,
+        'me_burst': False,
+        'emoji': {'id': emoji_id, 'name': emoji_name},
+        'burst_colors': [],
+        'users': users
+    }
+
+
+def reaction_count_entry(emoji_id: str | None, emoji_name: str, count: int, burst_count: int = 0) -> dict:
+    return {
+        'count': count,
+        'count_details': {'burst': burst_count, 'normal': count - burst_count},
+        'me': False,
+        'me_burst': False,
+        'emoji': {'id': emoji_id, 'name': emoji_name},
+        'burst_colors': [],
+        'users': [],
+        'hydrated': False
+    }
+
+
+def _matches(entry: dict, emoji_id: str | None, emoji_name: str) -> bool:
+    entry_emoji = entry.get('emoji', {})
+    if emoji_id:
+        return entry_emoji.get('id') == emoji_id
+    return not entry_emoji.get('id') and entry_emoji.get('name') == emoji_name
+
+
+def apply_reaction_changes_to_list(reactions: list[dict], changes: ReactionChanges) -> list[dict]:
+    reactions = [dict(entry) for entry in reactions]
+
+    for (emoji_id, emoji_name, user_id), (added, delta) in changes.items():
+        index = next((i for i, entry in enumerate(reactions) if _matches(entry, emoji_id, emoji_name)), None)
+        users = list(reactions[index].get('users', [])) if index is not None else []
+        was_member = user_id in users
+
+        if added and not was_member:
+            users.append(user_id)
+        elif not added and was_member:
+            users.remove(user_id)
+
+        if index is not None and reactions[index].get('hydrated') is False:
+            # Only the count is known, so adjust it instead of recounting the users. A known
+            # user counts only when their membership changes; for anyone else the net number
+            # of events says whether they joined (+1), left (-1) or ended where they started (0)
+            entry = reactions[index]
+            change = (0 if added else -1) if was_member else max(-1, min(1, delta))
+            count = max(0, int(entry.get('count') or 0) + change)
+            if count:
+                burst = min(entry.get('count_details', {}).get('burst', 0), count)
+                reactions[index] = {**reaction_count_entry(emoji_id, emoji_name, count, burst), 'users': users}
+            else:
+                del reactions[index]
+        elif index is None:
+            if users:
+                reactions.append(reaction_entry(emoji_id, emoji_name, users))
+        elif users:
+            reactions[index] = reaction_entry(emoji_id, emoji_name, users)
+        else:
+            del reactions[index]
+
+    return reactions
+
+
+def reaction_rows(message_id: int, reactions: list[dict] | None) -> list[dict]:
+    rows = []
+    for entry in reactions or []:
+        emoji = entry.get('emoji') or {}
+        if not emoji.get('name'):
+            continue
+        users = list(entry.get('users') or [])
+        if entry.get('hydrated') is False:
+            users.append(UNKNOWN_REACTOR_ID)
+        for user_id in users:
+            rows.append({
+                "message_id": message_id,
+                "emoji_id": emoji.get('id'),
+                "emoji_name": emoji['name'],
+                "user_id": int(user_id),
+            })
+    return rows
+
+
+# Insert normalized reaction rows; duplicates are ignored. Does not commit.
+async def insert_reaction_rows(db: AsyncSession, rows: list[dict]) -> None:
+    if not rows:
+        return
+    await db.execute(insert(MessageReaction.__table__).on_conflict_do_nothing(), rows)
+
+
+# Rebuild the normalized rows of some messages from their JSON lists. Does not commit.
+async def replace_message_reactions(db: AsyncSession, reactions_by_message: dict[int, list[dict]]) -> None:
+    if not reactions_by_message:
+        return
+    await db.execute(
+        delete(MessageReaction)
+        .where(MessageReaction.message_id.in_(list(reactions_by_message)))
+        .execution_options(synchronize_session=False)
+    )
+    rows = []
+    for message_id, reactions in reactions_by_message.items():
+        rows.extend(reaction_rows(message_id, reactions))
+    await insert_reaction_rows(db, rows)
+
+
+async def _sync_reaction_changes(db: AsyncSession, message_id: int, changes: ReactionChanges) -> None:
+    added = [
+        {"message_id": message_id, "emoji_id": emoji_id, "emoji_name": emoji_name, "user_id": user_id}
+        for (emoji_id, emoji_name, user_id), (is_add, _) in changes.items() if is_add
+    ]
+    removed = [key for key, (is_add, _) in changes.items() if not is_add]
+
+    await insert_reaction_rows(db, added)
+    if removed:
+        await db.execute(
+            delete(MessageReaction).where(
+                MessageReaction.message_id == message_id,
+                or_(*[
+                    and_(
+                        func.coalesce(MessageReaction.emoji_id, '') == (emoji_id or ''),
+                        MessageReaction.emoji_name == emoji_name,
+                        MessageReaction.user_id == user_id,
+                    )
+                    for emoji_id, emoji_name, user_id in removed
+                ])
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+# Apply a set of reaction adds/removes to one message in a single row-locked transaction.
+# The merge (user lists per emoji, count-only entries) is done in Python, so the list is read
+# under FOR UPDATE and written back; the reaction buffer keeps this to one transaction per
+# message per coalescing window rather than one per event.
+async def apply_reaction_changes(db: AsyncSession, message_id: int, changes: ReactionChanges) -> bool:
+    result = await db.execute(
+        select(Message.reactions).filter(Message.id == message_id).with_for_update()
+    )
+    row = result.first()
+    if row is None:
+        await db.rollback()
+        return False
+
+    reactions = apply_reaction_changes_to_list(row.reactions or [], changes)
+    await db.execute(update(Message).where(Message.id == message_id).values(reactions=reactions))
+    if any(entry.get('hydrated') is False for entry in (row.reactions or []) + reactions):
+        # Count-only entries own a placeholder row; rebuild the message's rows from the list
+        await replace_message_reactions(db, {message_id: reactions})
+    else:
+        await _sync_reaction_changes(db, message_id, changes)
+    await db.commit()
+    return True
+
+
+# Replace one message's reactions with a freshly fetched snapshot, row-locked against live reaction writes
+async def set_message_reactions(db: AsyncSession, message_id: int, reactions: list[dict]) -> bool:
+    result = await db.execute(
+        select(Message.id).filter(Message.id == message_id).with_for_update()
+    )
+    if result.first() is None:
+        await db.rollback()
+        return False
+
+    await db.execute(update(Message).where(Message.id == message_id).values(reactions=reactions))
+    await replace_message_reactions(db, {message_id: reactions})
+    await db.commit()
+    return True
+
+
+# Reaction counts per emoji for one message
+async def get_message_reactions(db: AsyncSession, message_id: int) -> list[tuple[str, int]]:
+    result = await db.execute(
+        select(MessageReaction.emoji_name, func.count())
+        .filter(MessageReaction.message_id == message_id, MessageReaction.user_id != UNKNOWN_REACTOR_ID)
+        .group_by(MessageReaction.emoji_id, MessageReaction.emoji_name)
+        .order_by(func.count().desc())
+    )
+    return [(emoji_name, count) for emoji_name, count in result.all()]
+
+
+# SQL predicate: the message has at least one of the given emojis (by name)
+def has_any_reaction(emoji_names: list[str]):
+    return exists().where(
+        MessageReaction.message_id == Message.id,
+        MessageReaction.emoji_name.in_(emoji_names),
+    )
@@ -0,0 +1,50 @@
+from db.schema import ChannelSyncState
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from datetime import datetime, timezone
+
+# H. Channel sync state
+
+# One row per channel recording the contiguous range of message ids that
+# reconcile/backfill have archived, so each direction resumes where it
+# stopped without looking at the messages table.
+
+
+async def get_sync_state(db: AsyncSession, channel_id: int) -> ChannelSyncState | None:
+    result = await db.execute(select(ChannelSyncState).filter(ChannelSyncState.channel_id == channel_id))
+    return result.scalar_one_or_none()
+
+
+# Widen the synced range to cover a page of ids. Does not commit: call it in the page's transaction.
+async def advance_sync_state(db: AsyncSession, channel_id: int, message_ids: list[int]) -> None:
+    if not message_ids:
+        return
+    table = ChannelSyncState.__table__
+    stmt = insert(table).values(channel_id=channel_id, high_water_id=max(message_ids), low_water_id=min(message_ids))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.channel_id],
+        set_={
+            "high_water_id": func.greatest(func.coalesce(table.c.high_water_id, stmt.excluded.high_water_id), stmt.excluded.high_water_id),
+            "low_water_id": func.least(func.coalesce(table.c.low_water_id, stmt.excluded.low_water_id), stmt.excluded.low_water_id),
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+# Record the start or end of a run in one direction; `complete` means it reached the end of the history
+async def mark_sync_run(db: AsyncSession, channel_id: int, backfill: bool, complete: bool) -> None:
+    table = ChannelSyncState.__table__
+    values = {"backfill_complete": complete} if backfill else {"reconcile_complete": complete}
+    if complete:
+        values["last_backfill_at" if backfill else "last_reconcile_at"] = datetime.now(timezone.utc)
+
+    stmt = insert(table).values(channel_id=channel_id, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.channel_id],
+        set_={**values, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+    await db.commit()
@@ -1,26 +1,44 @@
 from db.schema import User
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+# Profile columns refreshed when a user already exists
+USER_UPDATE_COLUMNS = ("username", "avatar", "global_name", "bot", "system")
+
+
+def _user_row(user: User) -> dict:
+    return {
+        "id": user.id,
+        "username": user.username,
+        "discriminator": user.discriminator,
+        "global_name": user.global_name,
+        "avatar": user.avatar,
+        "bot": user.bot,
+        "system": user.system,
+    }
+
 # upsert a user
 async def upsert_user(db: AsyncSession, user: User) -> User:
-    result = await db.execute(select(User).filter(User.id == user.id))
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.username = user.username
-        existing.avatar = user.avatar
-        existing.global_name = user.global_name
-        existing.bot = user.bot
-        existing.system = user.system
-        await db.commit()
-        await db.refresh(existing)
-        return existing
-    else:
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        return user
+    await bulk_upsert_users(db, [user])
+    return user
+
+# upsert many users in one INSERT ... ON CONFLICT DO UPDATE
+async def bulk_upsert_users(db: AsyncSession, users: list[User]) -> list[User]:
+    if not users:
+        return users
+
+    # Postgres rejects a multi-row upsert that touches the same id twice
+    unique_users = list({user.id: user for user in users}.values())
+
+    stmt = insert(User.__table__).values([_user_row(user) for user in unique_users])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.__table__.c.id],
+        set_={column: stmt.excluded[column] for column in USER_UPDATE_COLUMNS},
+    )
+    await db.execute(stmt)
+    await db.commit()
+    return unique_users
 
 # Get user by ID
 async def get_user(db: AsyncSession, user_id: int) -> User | None:
@@ -1,6 +1,7 @@
 from enum import Enum
-from sqlalchemy import Column, Enum as SQLEnum, ForeignKey, Integer, BigInteger, String, DateTime, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Enum as SQLEnum, ForeignKey, Integer, BigInteger, String, DateTime, Boolean, JSON, Index, FetchedValue, case, func, literal_column
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.mutable import MutableList, MutableDict
@@ -90,12 +91,12 @@ class Message(Base):
     tts = Column(Boolean, default=False)
     mention_everyone = Column(Boolean, default=False)
 
-    mentions = Column(MutableList.as_mutable(JSON), default=list)
+    mentions = Column(MutableList.as_mutable(JSONB), default=list)
     mention_roles = Column(MutableList.as_mutable(JSON), default=list)
     mention_channels = Column(MutableList.as_mutable(JSON), default=list)
-    attachments = Column(MutableList.as_mutable(JSON), default=list)
-    embeds = Column(MutableList.as_mutable(JSON), default=list)
-    reactions = Column(MutableList.as_mutable(JSON), default=list)
+    attachments = Column(MutableList.as_mutable(JSONB), default=list)
+    embeds = Column(MutableList.as_mutable(JSONB), default=list)
+    reactions = Column(MutableList.as_mutable(JSONB), default=list)
 
     nonce = Column(String, nullable=True)
 
@@ -110,8 +111,8 @@ class Message(Base):
 
     flags = Column(Integer, nullable=True)
 
-    message_reference = Column(MutableDict.as_mutable(JSON), nullable=True)
-    referenced_message = Column(MutableDict.as_mutable(JSON), nullable=True) 
+    message_reference = Column(MutableDict.as_mutable(JSONB), nullable=True)
+    referenced_message = Column(MutableDict.as_mutable(JSONB), nullable=True)
     interaction_metadata = Column(MutableDict.as_mutable(JSON), nullable=True)
 
     components = Column(JSON, nullable=True)
@@ -128,5 +129,130 @@ class Message(Base):
 
     position = Column(Integer, nullable=True)
 
+    # Hash per part of the message as last seen on Discord; reconcile rewrites only the parts that differ
+    fingerprint = Column(JSONB, nullable=True)
+
+    # Full-text vector of `content`, maintained by the messages_content_tsv trigger
+    content_tsv = deferred(Column(TSVECTOR, FetchedValue(), FetchedValue(for_update=True), nullable=True))
+
     def __repr__(self):
         return f"<Message id={self.id} channel={self.channel_id}>"
+
+
+# Text search configuration used by the content_tsv trigger and /search queries
+SEARCH_TS_CONFIG = "english"
+
+
+# Number of distinct emojis on a message; backs the reactions_desc sort
+reaction_count = case(
+    (func.jsonb_typeof(Message.reactions) == literal_column("'array'"), func.jsonb_array_length(Message.reactions)),
+    else_=literal_column("0"),
+)
+
+Index("ix_messages_channel_id_timestamp", Message.channel_id, Message.timestamp.desc())
+Index("ix_messages_author_id_timestamp", Message.author_id, Message.timestamp.desc())
+Index("ix_messages_channel_id_id", Message.channel_id, Message.id.desc())
+Index("ix_messages_timestamp_id", Message.timestamp.desc(), Message.id.desc())
+Index("ix_messages_reaction_count_timestamp_id", reaction_count.desc(), Message.timestamp.desc(), Message.id.desc())
+Index("ix_messages_channel_id_reaction_count_timestamp_id", Message.channel_id, reaction_count.desc(), Message.timestamp.desc(), Message.id.desc())
+Index("ix_messages_reactions_gin", Message.reactions, postgresql_using="gin", postgresql_ops={"reactions": "jsonb_path_ops"})
+Index("ix_messages_mentions_gin", Message.mentions, postgresql_using="gin", postgresql_ops={"mentions": "jsonb_path_ops"})
+Index("ix_messages_content_tsv", Message.content_tsv, postgresql_using="gin")
+
+
+class AttachmentBlob(Base):
+    """Maps a Discord attachment (by id and URL) to its content-addressed file."""
+    __tablename__ = "attachment_blobs"
+
+    attachment_id = Column(BigInteger, primary_key=True)
+    url = Column(String, nullable=True, index=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<AttachmentBlob attachment_id={self.attachment_id} sha256={self.sha256}>"
+
+
+class MessageReaction(Base):
+    """One row per (message, emoji, user) reaction, mirrored from messages.reactions."""
+    __tablename__ = "message_reactions"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    message_id = Column(
+        BigInteger,
+        ForeignKey("messages.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    emoji_id = Column(String, nullable=True)
+    emoji_name = Column(String, nullable=False)
+    user_id = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<MessageReaction message={self.message_id} emoji={self.emoji_name} user={self.user_id}>"
+
+
+# Unicode emojis have no id, so uniqueness treats a missing id as ''
+Index(
+    "uq_message_reactions_message_emoji_user",
+    MessageReaction.message_id,
+    func.coalesce(MessageReaction.emoji_id, literal_column("''")),
+    MessageReaction.emoji_name,
+    MessageReaction.user_id,
+    unique=True,
+)
+Index("ix_message_reactions_emoji_name_message_id", MessageReaction.emoji_name, MessageReaction.message_id)
+Index("ix_message_reactions_user_id", MessageReaction.user_id)
+
+
+class Attachment(Base):
+    """One row per Discord attachment, mirrored from messages.attachments."""
+    __tablename__ = "attachments"
+
+    id = Column(BigInteger, primary_key=True)
+    message_id = Column(
+        BigInteger,
+        ForeignKey("messages.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    filename = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=True)
+    content_type = Column(String, nullable=True)
+    url = Column(String, nullable=True)
+    local_path = Column(String, nullable=True)
+    sha256 = Column(String(64), nullable=True)
+
+    def __repr__(self):
+        return f"<Attachment id={self.id} message={self.message_id} filename={self.filename}>"
+
+
+# Trigram index so filename substring search (ILIKE '%term%') can use an index
+Index(
+    "ix_attachments_filename_trgm",
+    Attachment.filename,
+    postgresql_using="gin",
+    postgresql_ops={"filename": "gin_trgm_ops"},
+)
+
+
+class ChannelSyncState(Base):
+    """How far reconcile (forward) and backfill (backward) have archived each channel.
+
+    Messages from `low_water_id` to `high_water_id` are stored; both move
+    in the same transaction as the page that extends them.
+    """
+    __tablename__ = "channel_sync_state"
+
+    channel_id = Column(BigInteger, primary_key=True)
+    high_water_id = Column(BigInteger, nullable=True)
+    low_water_id = Column(BigInteger, nullable=True)
+    last_reconcile_at = Column(DateTime(timezone=True), nullable=True)
+    last_backfill_at = Column(DateTime(timezone=True), nullable=True)
+    reconcile_complete = Column(Boolean, default=False, nullable=False)
+    backfill_complete = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ChannelSyncState channel={self.channel_id} low={self.low_water_id} high={self.high_water_id}>"
@@ -0,0 +1,39 @@
+"""attachment blobs
+
+Revision ID: 8f2c1d4e6a7b
+Revises: 695bcf2b0305
+Create Date: 2026-10-18 10:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c1d4e6a7b'
+down_revision: Union[str, Sequence[str], None] = '695bcf2b0305'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attachment_blobs',
+    sa.Column('attachment_id', sa.BigInteger(), nullable=False),
+    sa.Column('url', sa.String(), nullable=True),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('attachment_id')
+    )
+    op.create_index(op.f('ix_attachment_blobs_url'), 'attachment_blobs', ['url'], unique=False)
+    op.create_index(op.f('ix_attachment_blobs_sha256'), 'attachment_blobs', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attachment_blobs_sha256'), table_name='attachment_blobs')
+    op.drop_index(op.f('ix_attachment_blobs_url'), table_name='attachment_blobs')
+    op.drop_table('attachment_blobs')
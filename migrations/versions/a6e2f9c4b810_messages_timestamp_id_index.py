@@ -0,0 +1,31 @@
+"""messages timestamp id index
+
+Revision ID: a6e2f9c4b810
+Revises: f3c81d6b9a47
+Create Date: 2026-10-18 15:48:03.126590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e2f9c4b810'
+down_revision: Union[str, Sequence[str], None] = 'f3c81d6b9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Backs keyset paging over (timestamp, id) when /list is browsed without a channel or member filter
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_timestamp_id ON messages (timestamp DESC, id DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_timestamp_id")
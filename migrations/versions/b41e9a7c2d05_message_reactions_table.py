@@ -0,0 +1,59 @@
+"""message reactions table
+
+Revision ID: b41e9a7c2d05
+Revises: 8f2c1d4e6a7b
+Create Date: 2026-10-18 11:03:17.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e9a7c2d05'
+down_revision: Union[str, Sequence[str], None] = '8f2c1d4e6a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('message_reactions',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('message_id', sa.BigInteger(), nullable=False),
+    sa.Column('emoji_id', sa.String(), nullable=True),
+    sa.Column('emoji_name', sa.String(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['message_id'], ['messages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("""
+        CREATE UNIQUE INDEX uq_message_reactions_message_emoji_user
+        ON message_reactions (message_id, COALESCE(emoji_id, ''), emoji_name, user_id)
+    """)
+    op.create_index('ix_message_reactions_emoji_name_message_id', 'message_reactions', ['emoji_name', 'message_id'], unique=False)
+    op.create_index('ix_message_reactions_user_id', 'message_reactions', ['user_id'], unique=False)
+
+    # Backfill from the JSON reaction lists already stored on messages
+    op.execute("""
+        INSERT INTO message_reactions (message_id, emoji_id, emoji_name, user_id)
+        SELECT m.id, r.value -> 'emoji' ->> 'id', r.value -> 'emoji' ->> 'name', u.value::bigint
+        FROM messages m
+        CROSS JOIN LATERAL json_array_elements(m.reactions) AS r(value)
+        CROSS JOIN LATERAL json_array_elements_text(r.value -> 'users') AS u(value)
+        WHERE json_typeof(m.reactions) = 'array'
+          AND json_typeof(r.value -> 'users') = 'array'
+          AND r.value -> 'emoji' ->> 'name' IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_message_reactions_user_id', table_name='message_reactions')
+    op.drop_index('ix_message_reactions_emoji_name_message_id', table_name='message_reactions')
+    op.execute("DROP INDEX IF EXISTS uq_message_reactions_message_emoji_user")
+    op.drop_table('message_reactions')
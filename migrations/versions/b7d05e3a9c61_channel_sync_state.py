@@ -0,0 +1,49 @@
+"""channel sync state
+
+Per-channel high/low water marks for reconcile and backfill. Channels that
+were archived before this table existed start from the range of ids they
+already hold.
+
+Revision ID: b7d05e3a9c61
+Revises: a6e2f9c4b810
+Create Date: 2026-10-18 16:31:44.902317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d05e3a9c61'
+down_revision: Union[str, Sequence[str], None] = 'a6e2f9c4b810'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'channel_sync_state',
+        sa.Column('channel_id', sa.BigInteger(), nullable=False),
+        sa.Column('high_water_id', sa.BigInteger(), nullable=True),
+        sa.Column('low_water_id', sa.BigInteger(), nullable=True),
+        sa.Column('last_reconcile_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_backfill_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('reconcile_complete', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('backfill_complete', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('channel_id')
+    )
+
+    # Seed from what is archived already; uses ix_messages_channel_id_id
+    op.execute("""
+        INSERT INTO channel_sync_state (channel_id, high_water_id, low_water_id)
+        SELECT channel_id, max(id), min(id) FROM messages GROUP BY channel_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('channel_sync_state')
@@ -0,0 +1,34 @@
+"""messages fingerprint
+
+Per-part hashes of each message as last seen on Discord, compared by
+reconcile to find changed rows. Existing rows start without one and get it
+the next time reconcile sees them.
+
+Revision ID: c4f81e2d7a93
+Revises: b7d05e3a9c61
+Create Date: 2026-10-18 17:12:09.551842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f81e2d7a93'
+down_revision: Union[str, Sequence[str], None] = 'b7d05e3a9c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default, so adding it does not rewrite the table
+    op.add_column('messages', sa.Column('fingerprint', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('messages', 'fingerprint')
@@ -0,0 +1,61 @@
+"""attachments table
+
+Revision ID: c7d3f0a9e218
+Revises: b41e9a7c2d05
+Create Date: 2026-10-18 11:48:55.031672
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d3f0a9e218'
+down_revision: Union[str, Sequence[str], None] = 'b41e9a7c2d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table('attachments',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('message_id', sa.BigInteger(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('url', sa.String(), nullable=True),
+    sa.Column('local_path', sa.String(), nullable=True),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.ForeignKeyConstraint(['message_id'], ['messages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_attachments_message_id'), 'attachments', ['message_id'], unique=False)
+    op.create_index(
+        'ix_attachments_filename_trgm', 'attachments', ['filename'], unique=False,
+        postgresql_using='gin', postgresql_ops={'filename': 'gin_trgm_ops'}
+    )
+
+    # Backfill from the JSON attachment lists already stored on messages
+    op.execute("""
+        INSERT INTO attachments (id, message_id, filename, size, content_type, url, local_path, sha256)
+        SELECT (a.value ->> 'id')::bigint, m.id, a.value ->> 'filename', (a.value ->> 'size')::bigint,
+               a.value ->> 'content_type', a.value ->> 'url', a.value ->> 'local_path', b.sha256
+        FROM messages m
+        CROSS JOIN LATERAL json_array_elements(m.attachments) AS a(value)
+        LEFT JOIN attachment_blobs b ON b.attachment_id = (a.value ->> 'id')::bigint
+        WHERE json_typeof(m.attachments) = 'array'
+          AND a.value ->> 'id' IS NOT NULL
+        ON CONFLICT (id) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attachments_filename_trgm', table_name='attachments')
+    op.drop_index(op.f('ix_attachments_message_id'), table_name='attachments')
+    op.drop_table('attachments')
@@ -0,0 +1,115 @@
+"""messages json to jsonb
+
+Converts the hot structured columns of messages to JSONB without a long
+table rewrite under an exclusive lock: shadow JSONB columns are added and
+kept in sync by a trigger, existing rows are copied in id-ordered batches
+(each batch its own transaction), and the columns are swapped at the end.
+Indexes are built with CREATE INDEX CONCURRENTLY.
+
+Revision ID: d5a8e3b1f604
+Revises: c7d3f0a9e218
+Create Date: 2026-10-18 13:20:09.774120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8e3b1f604'
+down_revision: Union[str, Sequence[str], None] = 'c7d3f0a9e218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("attachments", "embeds", "reactions", "mentions", "message_reference", "referenced_message")
+BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1) Shadow columns, kept current for new writes by a trigger
+    for column in COLUMNS:
+        op.add_column('messages', sa.Column(f'{column}_jsonb', postgresql.JSONB(), nullable=True))
+
+    assignments = "\n".join(f"NEW.{column}_jsonb := NEW.{column}::jsonb;" for column in COLUMNS)
+    op.execute(f"""
+        CREATE FUNCTION messages_jsonb_sync() RETURNS trigger AS $$
+        BEGIN
+            {assignments}
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER messages_jsonb_sync
+        BEFORE INSERT OR UPDATE ON messages
+        FOR EACH ROW EXECUTE FUNCTION messages_jsonb_sync()
+    """)
+
+    # 2) Copy existing rows in batches, committing each one
+    set_clause = ", ".join(f"{column}_jsonb = {column}::jsonb" for column in COLUMNS)
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = None
+        while True:
+            upper_id = bind.execute(
+                sa.text(
+                    "SELECT max(id) FROM (SELECT id FROM messages WHERE (CAST(:last_id AS BIGINT) IS NULL OR id > :last_id) "
+                    "ORDER BY id LIMIT :batch_size) AS batch"
+                ),
+                {"last_id": last_id, "batch_size": BATCH_SIZE},
+            ).scalar()
+            if upper_id is None:
+                break
+
+            bind.execute(
+                sa.text(
+                    f"UPDATE messages SET {set_clause} "
+                    "WHERE (CAST(:last_id AS BIGINT) IS NULL OR id > :last_id) AND id <= :upper_id"
+                ),
+                {"last_id": last_id, "upper_id": upper_id},
+            )
+            last_id = upper_id
+
+    # 3) Swap the columns; dropping and renaming are catalog-only changes
+    op.execute("DROP TRIGGER messages_jsonb_sync ON messages")
+    op.execute("DROP FUNCTION messages_jsonb_sync()")
+    for column in COLUMNS:
+        op.drop_column('messages', column)
+        op.alter_column('messages', f'{column}_jsonb', new_column_name=column)
+
+    # 4) Indexes for the /list access paths
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_reaction_count
+            ON messages ((CASE WHEN jsonb_typeof(reactions) = 'array' THEN jsonb_array_length(reactions) ELSE 0 END) DESC)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_reactions_gin
+            ON messages USING gin (reactions jsonb_path_ops)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_mentions_gin
+            ON messages USING gin (mentions jsonb_path_ops)
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_mentions_gin")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_reactions_gin")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_reaction_count")
+
+    for column in COLUMNS:
+        op.alter_column(
+            'messages',
+            column,
+            existing_type=postgresql.JSONB(),
+            type_=sa.JSON(),
+            postgresql_using=f'{column}::json',
+            existing_nullable=True
+        )
@@ -0,0 +1,41 @@
+"""count-only reaction rows
+
+Mirror reaction entries stored from counts alone ("hydrated": false) into
+message_reactions as one placeholder row (user_id 0) per emoji, so the
+reaction filter answers them with its single EXISTS.
+
+Revision ID: d8a4b6e1f352
+Revises: c4f81e2d7a93
+Create Date: 2026-10-18 18:20:37.184406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a4b6e1f352'
+down_revision: Union[str, Sequence[str], None] = 'c4f81e2d7a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The containment test is served by ix_messages_reactions_gin
+    op.execute("""
+        INSERT INTO message_reactions (message_id, emoji_id, emoji_name, user_id)
+        SELECT m.id, r.value->'emoji'->>'id', r.value->'emoji'->>'name', 0
+        FROM messages m CROSS JOIN LATERAL jsonb_array_elements(m.reactions) AS r(value)
+        WHERE m.reactions @> '[{"hydrated": false}]'
+          AND r.value @> '{"hydrated": false}'
+          AND r.value->'emoji'->>'name' IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM message_reactions WHERE user_id = 0")
@@ -0,0 +1,50 @@
+"""reaction count keyset indexes
+
+Replace the bare emoji-count index with ones covering the full reactions_desc
+keyset (count, timestamp, id), globally and per channel like the timestamp
+indexes, so browsing /list by reactions reads pages straight from an index.
+
+Revision ID: e1b9c7f42a06
+Revises: d8a4b6e1f352
+Create Date: 2026-10-18 19:02:41.658213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b9c7f42a06'
+down_revision: Union[str, Sequence[str], None] = 'd8a4b6e1f352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REACTION_COUNT = "(CASE WHEN jsonb_typeof(reactions) = 'array' THEN jsonb_array_length(reactions) ELSE 0 END)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_reaction_count_timestamp_id
+            ON messages ({REACTION_COUNT} DESC, timestamp DESC, id DESC)
+        """)
+        op.execute(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_channel_id_reaction_count_timestamp_id
+            ON messages (channel_id, {REACTION_COUNT} DESC, timestamp DESC, id DESC)
+        """)
+        # Its leading column is covered by the keyset index above
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_reaction_count")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_reaction_count
+            ON messages ({REACTION_COUNT} DESC)
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_channel_id_reaction_count_timestamp_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_reaction_count_timestamp_id")
@@ -0,0 +1,35 @@
+"""message access path indexes
+
+Revision ID: e92b7c4a1d36
+Revises: d5a8e3b1f604
+Create Date: 2026-10-18 14:05:52.419987
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e92b7c4a1d36'
+down_revision: Union[str, Sequence[str], None] = 'd5a8e3b1f604'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction and keeps the table writable
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_channel_id_timestamp ON messages (channel_id, timestamp DESC)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_author_id_timestamp ON messages (author_id, timestamp DESC)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_channel_id_id ON messages (channel_id, id DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_channel_id_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_author_id_timestamp")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_channel_id_timestamp")
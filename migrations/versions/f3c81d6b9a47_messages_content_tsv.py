@@ -0,0 +1,86 @@
+"""messages content tsvector
+
+Adds messages.content_tsv for full-text search. The column is maintained by
+a trigger rather than declared GENERATED ... STORED, which would rewrite the
+whole table under an exclusive lock; existing rows are filled in id-ordered
+batches and the GIN index is built with CREATE INDEX CONCURRENTLY.
+
+Revision ID: f3c81d6b9a47
+Revises: e92b7c4a1d36
+Create Date: 2026-10-18 15:12:37.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c81d6b9a47'
+down_revision: Union[str, Sequence[str], None] = 'e92b7c4a1d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TS_CONFIG = "english"
+BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1) Nullable column without a default: catalog-only change
+    op.add_column('messages', sa.Column('content_tsv', postgresql.TSVECTOR(), nullable=True))
+
+    # 2) New and edited messages get their vector from a trigger
+    op.execute(f"""
+        CREATE FUNCTION messages_content_tsv_sync() RETURNS trigger AS $$
+        BEGIN
+            NEW.content_tsv := to_tsvector('{TS_CONFIG}', coalesce(NEW.content, ''));
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER messages_content_tsv_sync
+        BEFORE INSERT OR UPDATE OF content ON messages
+        FOR EACH ROW EXECUTE FUNCTION messages_content_tsv_sync()
+    """)
+
+    # 3) Existing rows in batches, committing each one
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = None
+        while True:
+            upper_id = bind.execute(
+                sa.text(
+                    "SELECT max(id) FROM (SELECT id FROM messages WHERE (CAST(:last_id AS BIGINT) IS NULL OR id > :last_id) "
+                    "ORDER BY id LIMIT :batch_size) AS batch"
+                ),
+                {"last_id": last_id, "batch_size": BATCH_SIZE},
+            ).scalar()
+            if upper_id is None:
+                break
+
+            bind.execute(
+                sa.text(
+                    f"UPDATE messages SET content_tsv = to_tsvector('{TS_CONFIG}', coalesce(content, '')) "
+                    "WHERE (CAST(:last_id AS BIGINT) IS NULL OR id > :last_id) AND id <= :upper_id AND content_tsv IS NULL"
+                ),
+                {"last_id": last_id, "upper_id": upper_id},
+            )
+            last_id = upper_id
+
+    # 4) Search index
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_content_tsv ON messages USING gin (content_tsv)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_content_tsv")
+
+    op.execute("DROP TRIGGER IF EXISTS messages_content_tsv_sync ON messages")
+    op.execute("DROP FUNCTION IF EXISTS messages_content_tsv_sync()")
+    op.drop_column('messages', 'content_tsv')